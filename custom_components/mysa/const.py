@@ -22,6 +22,15 @@ MQTT_KEEPALIVE: int = 60
 MQTT_PING_INTERVAL: int = 25
 """Interval between MQTT PINGREQ packets (less than keepalive)"""
 
+MQTT_HANDSHAKE_TIMEOUT: float = 10.0
+"""Seconds allowed for CONNACK/SUBACK before a connection attempt is abandoned"""
+
+MQTT_INFLIGHT_WINDOW: int = 16
+"""Maximum QoS 1 commands awaiting PUBACK on the persistent connection"""
+
+MQTT_INFLIGHT_TIMEOUT: float = 10.0
+"""Seconds a command waits for a free in-flight slot before falling back"""
+
 MQTT_USER_AGENT: str = "okhttp/4.11.0"
 """User-Agent header matching Mysa Android app"""
 
@@ -8,10 +8,16 @@ Copyright 2018 Jason Litzinger - MIT License
 https://github.com/jlitzingerdev/mqttpacket
 
 Adapted and simplified for the Mysa Home Assistant integration.
+
+Parsers accept ``bytes``, ``bytearray`` or ``memoryview`` input without
+copying it first. ``parse`` returns the number of bytes consumed, so a caller
+reading into a long-lived buffer can drop (or skip past) that prefix and keep
+any trailing partial packet for the next read.
 """
 
 import struct
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, field
 from typing import Any
 
 # MQTT 3.1.1 Packet Types
@@ -29,11 +35,19 @@ PROTOCOL_LEVEL = 4  # MQTT 3.1.1
 VALID_QOS = (0x00, 0x01, 0x02)
 PROTOCOL_NAME = b"MQTT"
 
+# CONNECT variable header: name length, name, level, flags, keepalive
+_CONNECT_HEADER = struct.Struct("!H4sBBH")
+# Big-endian u16 for string lengths and packet ids. Encoders only: the parser
+# reads two bytes inline, which is cheaper than a call plus a 1-tuple.
+_U16 = struct.Struct("!H")
+
 
 # --- Packet Data Classes ---
+# Slotted: one instance is allocated per received packet, so skipping the
+# per-instance __dict__ keeps the receive loop's allocations small.
 
 
-@dataclass
+@dataclass(slots=True)
 class ConnackPacket:
     """Parsed CONNACK packet."""
 
@@ -42,7 +56,7 @@ class ConnackPacket:
     pkt_type: int = MQTT_PACKET_CONNACK
 
 
-@dataclass
+@dataclass(slots=True)
 class SubackPacket:
     """Parsed SUBACK packet."""
 
@@ -51,7 +65,7 @@ class SubackPacket:
     pkt_type: int = MQTT_PACKET_SUBACK
 
 
-@dataclass
+@dataclass(slots=True)
 class PublishPacket:
     """Parsed PUBLISH packet."""
 
@@ -64,7 +78,7 @@ class PublishPacket:
     pkt_type: int = MQTT_PACKET_PUBLISH
 
 
-@dataclass
+@dataclass(slots=True)
 class PubackPacket:
     """Parsed PUBACK packet."""
 
@@ -72,28 +86,40 @@ class PubackPacket:
     pkt_type: int = MQTT_PACKET_PUBACK
 
 
-@dataclass
+@dataclass(slots=True)
 class PingrespPacket:
     """Parsed PINGRESP packet."""
 
     pkt_type: int = MQTT_PACKET_PINGRESP
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SubscriptionSpec:
-    """Subscription topic/QoS pair."""
+    """Subscription topic/QoS pair (slotted: built three per device).
+
+    Frozen so the cached encoding can't go stale; instances are shared.
+    """
 
     topicfilter: str
     qos: int
+    _encoded: bytes = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Encode the spec once; the same specs are resent on every reconnect."""
+        encoded = self.topicfilter.encode("utf-8")
+        object.__setattr__(
+            self,
+            "_encoded",
+            _U16.pack(len(encoded)) + encoded + struct.pack("!B", self.qos),
+        )
 
     def remaining_len(self) -> int:
         """Calculate the remaining length for this subscription spec."""
-        return 3 + len(self.topicfilter.encode("utf-8"))
+        return len(self._encoded)
 
     def to_bytes(self) -> bytes:
         """Convert the subscription spec to bytes."""
-        encoded = self.topicfilter.encode("utf-8")
-        return struct.pack("!H", len(encoded)) + encoded + struct.pack("!B", self.qos)
+        return self._encoded
 
 
 # --- Helper Functions ---
@@ -116,7 +142,7 @@ def _encode_remaining_length(remaining_length: int) -> bytes:
 def _encode_string(text: str) -> bytes:
     """Encode a string as per MQTT spec: two byte length, UTF-8 data."""
     encoded_text = text.encode("utf-8")
-    return struct.pack("!H", len(encoded_text)) + encoded_text
+    return _U16.pack(len(encoded_text)) + encoded_text
 
 
 # --- Packet Builders ---
@@ -125,12 +151,12 @@ def _encode_string(text: str) -> bytes:
 def connect(client_id: str, keepalive: int = 60) -> bytes:
     """Create a CONNECT packet."""
     msg = bytes([MQTT_PACKET_CONNECT << 4])
-    meta = struct.pack(
-        "!H4sBBH", 0x0004, PROTOCOL_NAME, PROTOCOL_LEVEL, 0x02, keepalive
-    )
+    meta = _CONNECT_HEADER.pack(0x0004, PROTOCOL_NAME, PROTOCOL_LEVEL, 0x02, keepalive)
     encoded_client_id = _encode_string(client_id) if client_id else b""
     remaining_length = len(meta) + len(encoded_client_id)
-    return msg + _encode_remaining_length(remaining_length) + meta + encoded_client_id
+    return b"".join(
+        (msg, _encode_remaining_length(remaining_length), meta, encoded_client_id)
+    )
 
 
 def pingreq() -> bytes:
@@ -145,14 +171,9 @@ def disconnect() -> bytes:
 
 def subscribe(packetid: int, topicspecs: list[SubscriptionSpec]) -> bytes:
     """Create a SUBSCRIBE packet."""
-    remaining_len = 2  # packetid
-    for spec in topicspecs:
-        remaining_len += spec.remaining_len()
-
+    body = b"".join([_U16.pack(packetid), *(s.to_bytes() for s in topicspecs)])
     msg = bytes([(MQTT_PACKET_SUBSCRIBE << 4) | 0x02])
-    parts = [msg, _encode_remaining_length(remaining_len), struct.pack("!H", packetid)]
-    parts.extend(s.to_bytes() for s in topicspecs)
-    return b"".join(parts)
+    return b"".join((msg, _encode_remaining_length(len(body)), body))
 
 
 def publish(  # TODO: Refactor to reduce arguments
@@ -169,87 +190,111 @@ def publish(  # TODO: Refactor to reduce arguments
     if qos > 0 and packet_id is None:
         raise ValueError("QoS > 0 requires a packet_id")
 
-    remaining_len = len(payload)
-    encoded_packet_id = b""
-    if qos > 0:
-        remaining_len += 2
-        encoded_packet_id = struct.pack("!H", packet_id)
-
+    # Topic is UTF-8 encoded once; its length prefix counts encoded bytes
     encoded_topic = _encode_string(topic)
-    remaining_len += len(encoded_topic)
+    encoded_packet_id = _U16.pack(packet_id) if qos > 0 else b""
+    remaining_len = len(encoded_topic) + len(encoded_packet_id) + len(payload)
 
     byte1 = (MQTT_PACKET_PUBLISH << 4) | (int(dup) << 3) | (qos << 1) | int(retain)
-    return (
-        bytes([byte1])
-        + _encode_remaining_length(remaining_len)
-        + encoded_topic
-        + encoded_packet_id
-        + payload
+    return b"".join(
+        (
+            bytes([byte1]),
+            _encode_remaining_length(remaining_len),
+            encoded_topic,
+            encoded_packet_id,
+            payload,
+        )
     )
 
 
 # --- Packet Parsers ---
 
-_MULTIPLIERS = (1, 128, 128 * 128, 128 * 128 * 128, 0)
 
-
-def parse(data: bytearray, output: list[Any]) -> int:
+def _decode_remaining_length(
+    data: bytes | memoryview, pos: int, data_len: int
+) -> tuple[int, int]:
+    """Decode a multi-byte remaining length whose first byte is at pos.
+
+    Returns (value, position after the field), or (-1, pos) if the field is
+    cut short. The spec caps the field at four bytes; a fifth byte is skipped
+    without contributing to the value.
+    """
+    value = 0
+    for shift in (0, 7, 14, 21):
+        if pos >= data_len:
+            return -1, pos
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 127) << shift
+        if not byte & 128:
+            return value, pos
+    if pos >= data_len:
+        return -1, pos
+    return value, pos + 1
+
+
+def parse(data: bytes | bytearray | memoryview, output: list[Any]) -> int:
     """Parse packets from data into output list. Returns bytes consumed."""
-    if not isinstance(data, bytearray):
-        raise TypeError("data must be a bytearray")
-
-    consumed = 0
-    offset = 0
-
-    while offset < len(data):
+    if isinstance(data, bytearray):
+        # Slicing a bytearray copies and bytes() would copy again; slicing a
+        # view copies once. Release it so the caller may resize the buffer.
+        with memoryview(data) as view:
+            return _parse_buffer(view, output)
+    if not isinstance(data, (bytes, memoryview)):
+        raise TypeError("data must be bytes, bytearray or memoryview")
+    return _parse_buffer(data, output)
+
+
+def _parse_buffer(data: bytes | memoryview, output: list[Any]) -> int:
+    """Parse packets from a bytes-like buffer. Returns bytes consumed."""
+    # Loop invariants hoisted to locals: every packet in a frame reuses them
+    data_len = len(data)
+    append = output.append
+    offset = 0  # Start of the current packet; equals bytes consumed so far
+
+    while offset < data_len:
         first_byte = data[offset]
-        pkt_type = first_byte >> 4
         variable_begin = offset + 1
-        remaining_length = 0
-        nb = 0
-
-        while True:
-            if variable_begin >= len(data):
-                return consumed
-            remaining_length += (data[variable_begin] & 127) * _MULTIPLIERS[nb]
-            nb += 1
-            if nb >= 5 or (data[variable_begin] & 128) == 0:
-                break
+        if variable_begin >= data_len:
+            return offset
+
+        # Fast path: packets under 128 bytes carry a single length byte
+        remaining_length = data[variable_begin]
+        if remaining_length & 128:
+            remaining_length, variable_begin = _decode_remaining_length(
+                data, variable_begin, data_len
+            )
+            if remaining_length < 0:
+                return offset
+        else:
             variable_begin += 1
 
-        variable_begin += 1
-        size_rem_len = variable_begin - offset - 1
+        end_packet = variable_begin + remaining_length
+        if end_packet > data_len:
+            return offset
 
-        if (len(data) - offset) < (remaining_length + 1 + size_rem_len):
-            return consumed
+        parser = _DISPATCH[first_byte]
+        if parser is not None:
+            append(parser(first_byte, data, remaining_length, variable_begin))
 
-        pkt = _parse_packet(
-            pkt_type, first_byte, data, remaining_length, variable_begin
-        )
-        if pkt:
-            output.append(pkt)
+        offset = end_packet
 
-        consumed += size_rem_len + 1 + remaining_length
-        offset = consumed
-
-    return consumed
+    return offset
 
 
 def parse_one(
-    data: bytes | bytearray,
+    data: bytes | bytearray | memoryview,
 ) -> (
     ConnackPacket | SubackPacket | PublishPacket | PubackPacket | PingrespPacket | None
 ):
     """Parse a single packet from data."""
-    if not isinstance(data, bytearray):
-        data = bytearray(data)
     output: list[Any] = []
     parse(data, output)
     return output[0] if output else None
 
 
 def parse_mqtt_packet(
-    data: bytes | bytearray,
+    data: bytes | bytearray | memoryview,
 ) -> (
     ConnackPacket | SubackPacket | PublishPacket | PubackPacket | PingrespPacket | None
 ):
@@ -257,49 +302,101 @@ def parse_mqtt_packet(
     return parse_one(data)
 
 
-def _parse_packet(
-    pkt_type: int,
+def _parse_publish(
     first_byte: int,
-    data: bytearray,
+    data: bytes | bytearray | memoryview,
     remaining_length: int,
     variable_begin: int,
-) -> (
-    ConnackPacket | SubackPacket | PublishPacket | PubackPacket | PingrespPacket | None
-):
-    """Parse a single packet based on type."""
-    if pkt_type == MQTT_PACKET_CONNACK:
-        return ConnackPacket(data[variable_begin + 1], data[variable_begin])
-
-    if pkt_type == MQTT_PACKET_SUBACK:
-        end_payload = remaining_length + variable_begin
-        packet_id = (data[variable_begin] << 8) | data[variable_begin + 1]
-        return SubackPacket(packet_id, list(data[variable_begin + 2 : end_payload]))
-
-    if pkt_type == MQTT_PACKET_PUBLISH:
-        flags = first_byte & 0x0F
-        qos = (flags & 0x06) >> 1
-        end_packet = remaining_length + variable_begin
-        topic_len = (data[variable_begin] << 8) | data[variable_begin + 1]
-        topic_start = variable_begin + 2
-        topic = data[topic_start : topic_start + topic_len].decode("utf-8")
-        payload_start = topic_start + topic_len
-        packetid = None
-        if qos:
-            packetid = (data[payload_start] << 8) | data[payload_start + 1]
-            payload_start += 2
-        return PublishPacket(
-            (flags & 0x08) >> 3,
-            qos,
-            flags & 0x1,
-            topic,
-            packetid,
-            bytes(data[payload_start:end_packet]),
-        )
+) -> PublishPacket:
+    """Parse a PUBLISH packet body."""
+    qos = (first_byte >> 1) & 0x03
+    end_packet = remaining_length + variable_begin
+    topic_len = (data[variable_begin] << 8) | data[variable_begin + 1]
+    topic_start = variable_begin + 2
+    # Strict decode validates UTF-8 in the same pass; no separate check
+    topic = str(data[topic_start : topic_start + topic_len], "utf-8")
+    topic_end = topic_start + topic_len
+    # Layout is fixed by QoS alone: a two-byte packet id follows the topic
+    # iff QoS > 0; only the id read itself is conditional.
+    payload_start = topic_end + (2 if qos else 0)
+    packetid = (data[topic_end] << 8) | data[topic_end + 1] if qos else None
+    return PublishPacket(
+        (first_byte >> 3) & 0x01,
+        qos,
+        first_byte & 0x01,
+        topic,
+        packetid,
+        bytes(data[payload_start:end_packet]),
+    )
 
-    if pkt_type == MQTT_PACKET_PUBACK:
-        return PubackPacket((data[variable_begin] << 8) | data[variable_begin + 1])
 
-    if pkt_type == MQTT_PACKET_PINGRESP:
-        return PingrespPacket()
+def _parse_pingresp(
+    _first_byte: int,
+    _data: bytes | bytearray | memoryview,
+    _remaining_length: int,
+    _variable_begin: int,
+) -> PingrespPacket:
+    """Parse a PINGRESP packet (no body)."""
+    return PingrespPacket()
 
-    return None
+
+def _parse_puback(
+    _first_byte: int,
+    data: bytes | bytearray | memoryview,
+    _remaining_length: int,
+    variable_begin: int,
+) -> PubackPacket:
+    """Parse a PUBACK packet body."""
+    return PubackPacket((data[variable_begin] << 8) | data[variable_begin + 1])
+
+
+def _parse_suback(
+    _first_byte: int,
+    data: bytes | bytearray | memoryview,
+    remaining_length: int,
+    variable_begin: int,
+) -> SubackPacket:
+    """Parse a SUBACK packet body."""
+    end_payload = remaining_length + variable_begin
+    packet_id = (data[variable_begin] << 8) | data[variable_begin + 1]
+    return SubackPacket(packet_id, list(data[variable_begin + 2 : end_payload]))
+
+
+def _parse_connack(
+    _first_byte: int,
+    data: bytes | bytearray | memoryview,
+    _remaining_length: int,
+    variable_begin: int,
+) -> ConnackPacket:
+    """Parse a CONNACK packet body."""
+    return ConnackPacket(data[variable_begin + 1], data[variable_begin])
+
+
+# Parser per packet type, indexed by the high nibble of the first byte. All
+# parsers share one signature (unused arguments are underscored); types a
+# client never receives, or that we ignore, map to None and are skipped.
+_PARSERS: tuple[Callable[..., Any] | None, ...] = (
+    None,  # 0 reserved
+    None,  # 1 CONNECT
+    _parse_connack,  # 2 CONNACK
+    _parse_publish,  # 3 PUBLISH
+    _parse_puback,  # 4 PUBACK
+    None,  # 5 PUBREC
+    None,  # 6 PUBREL
+    None,  # 7 PUBCOMP
+    None,  # 8 SUBSCRIBE
+    _parse_suback,  # 9 SUBACK
+    None,  # 10 UNSUBSCRIBE
+    None,  # 11 UNSUBACK
+    None,  # 12 PINGREQ
+    _parse_pingresp,  # 13 PINGRESP
+    None,  # 14 DISCONNECT
+    None,  # 15 reserved
+)
+
+# _PARSERS expanded to every possible first byte, so the hot loop indexes by
+# the raw byte and never splits off the type nibble. Flags (QoS, DUP, RETAIN)
+# are still read from first_byte by the parser that needs them.
+_DISPATCH: tuple[Callable[..., Any] | None, ...] = tuple(
+    _PARSERS[first_byte >> 4] for first_byte in range(256)
+)
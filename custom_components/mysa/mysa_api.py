@@ -45,9 +45,12 @@ class MysaApi:
         wattages: dict[str, int] | None = None,
         simulated_energy: bool = False,
         websession: ClientSession | None = None,
+        clock: Callable[[], float] = time.time,
     ) -> None:
         """Initialize the API."""
         self.hass = hass
+        # Wall-clock source for command freshness and MQTT Timestamps
+        self._clock = clock
         self.coordinator_callback = coordinator_callback
         self.upgraded_lite_devices = upgraded_lite_devices or []
         self.estimated_max_current = estimated_max_current
@@ -195,7 +198,7 @@ class MysaApi:
         # 1. TREAT AS COMMAND: Update timestamp so subsequent Cloud Polls respecting
         # the 90s "freshness guard" will filter out stale keys (e.g. SetPoint)
         # effectively prioritizing this MQTT update over lagging Cloud data.
-        self._last_command_time[device_id] = time.time()
+        self._last_command_time[device_id] = self._clock()
 
         # Trust MQTT updates - they're real-time from the device
         # (HTTP polls use filter_stale=True in get_state to avoid cloud lag)
@@ -213,7 +216,7 @@ class MysaApi:
         missing_metadata = not fw_version or fw_version == "None" or not ip_addr
 
         if missing_metadata:
-            now = time.time()
+            now = self._clock()
             last_req = self._metadata_requested.get(device_id, 0)
             if now - last_req > 300:  # 5 minutes
                 _LOGGER.debug(
@@ -234,7 +237,7 @@ class MysaApi:
     async def set_target_temperature(self, device_id: str, temperature: float) -> None:
         """Set target temperature via MQTT."""
         # 0. IMMEDIATE OPTIMISTIC UPDATE
-        self._last_command_time[device_id] = time.time()
+        self._last_command_time[device_id] = self._clock()
         target_val = float(temperature)
         self._update_state_cache(
             device_id,
@@ -245,7 +248,7 @@ class MysaApi:
                 "a_sp": target_val,
                 "ACTemp": target_val,
                 "3": target_val,
-                "Timestamp": int(time.time()),
+                "Timestamp": int(self._clock()),
             },
         )
 
@@ -274,7 +277,7 @@ class MysaApi:
     async def set_hvac_mode(self, device_id: str, hvac_mode: str) -> None:
         """Set HVAC mode via MQTT."""
         # 0. IMMEDIATE OPTIMISTIC UPDATE
-        self._last_command_time[device_id] = time.time()
+        self._last_command_time[device_id] = self._clock()
         mode_str = str(hvac_mode).lower()
         device = self.devices.get(device_id)
 
@@ -306,7 +309,7 @@ class MysaApi:
                 "TstatMode": mode_val,
                 "ACMode": mode_val,
                 "2": mode_val,
-                "Timestamp": int(time.time()),
+                "Timestamp": int(self._clock()),
             },
         )
 
@@ -326,7 +329,7 @@ class MysaApi:
 
     async def notify_settings_changed(self, device_id: str) -> None:
         """Notify device to check cloud settings (MsgType 6)."""
-        timestamp = int(time.time())
+        timestamp = int(self._clock())
         body = {
             "Device": device_id.upper(),
             "EventType": 0,
@@ -340,7 +343,7 @@ class MysaApi:
 
     async def update_request(self, device_id: str) -> None:
         """Request metadata dump (MsgType 7): FW version, IP, Serial, MAC."""
-        timestamp = int(time.time())
+        timestamp = int(self._clock())
         body = {"Device": device_id, "Timestamp": timestamp, "MsgType": 7}
         # MsgType 7, wrap=False
         await self.realtime.send_command(
@@ -353,7 +356,7 @@ class MysaApi:
     async def set_lock(self, device_id: str, locked: bool) -> None:
         """Set lock state via HTTP."""
         # 0. IMMEDIATE OPTIMISTIC UPDATE
-        self._last_command_time[device_id] = time.time()
+        self._last_command_time[device_id] = self._clock()
         lock_val = 1 if locked else 0
         self._update_state_cache(
             device_id,
@@ -363,7 +366,7 @@ class MysaApi:
                 "alk": lock_val,
                 "lc": lock_val,
                 "ButtonState": lock_val,
-                "Timestamp": int(time.time()),
+                "Timestamp": int(self._clock()),
             },
         )
 
@@ -380,7 +383,7 @@ class MysaApi:
     async def set_ac_climate_plus(self, device_id: str, enabled: bool) -> None:
         """Set Climate+ state via HTTP."""
         # 0. IMMEDIATE OPTIMISTIC UPDATE
-        self._last_command_time[device_id] = time.time()
+        self._last_command_time[device_id] = self._clock()
         # User EcoMode/ecoMode: 0=On, 1=Off (inverted)
         eco_str = "0" if enabled else "1"
         self._update_state_cache(
@@ -391,7 +394,7 @@ class MysaApi:
                 "IsThermostatic": enabled,
                 "ecoMode": eco_str,
                 "eco": eco_str,
-                "Timestamp": int(time.time()),
+                "Timestamp": int(self._clock()),
             },
         )
 
@@ -423,8 +426,8 @@ class MysaApi:
     async def set_proximity(self, device_id: str, enabled: bool) -> None:
         """Set proximity sensing state via HTTP."""
         # 0. IMMEDIATE OPTIMISTIC UPDATE
-        self._last_command_time[device_id] = time.time()
-        self._last_command_time[device_id] = time.time()
+        self._last_command_time[device_id] = self._clock()
+        self._last_command_time[device_id] = self._clock()
         _LOGGER.debug("set_proximity(%s, %s) - Optimistic update", device_id, enabled)
         self._update_state_cache(
             device_id,
@@ -433,7 +436,7 @@ class MysaApi:
                 "px": enabled,
                 "pr": 1 if enabled else 0,
                 "Proximity": enabled,
-                "Timestamp": int(time.time()),
+                "Timestamp": int(self._clock()),
             },
         )
 
@@ -450,10 +453,10 @@ class MysaApi:
     async def set_sensor_mode(self, device_id: str, mode: int) -> None:
         """Set sensor mode (0=Ambient, 1=Floor) via HTTP."""
         # 0. IMMEDIATE OPTIMISTIC UPDATE
-        self._last_command_time[device_id] = time.time()
+        self._last_command_time[device_id] = self._clock()
         _LOGGER.debug("set_sensor_mode(%s, %s) - Optimistic update", device_id, mode)
         self._update_state_cache(
-            device_id, {"SensorMode": mode, "Timestamp": int(time.time())}
+            device_id, {"SensorMode": mode, "Timestamp": int(self._clock())}
         )
 
         # Trigger UI refresh NOW
@@ -474,13 +477,13 @@ class MysaApi:
     async def set_auto_brightness(self, device_id: str, enabled: bool) -> None:
         """Set auto brightness state via HTTP."""
         # 0. IMMEDIATE OPTIMISTIC UPDATE
-        self._last_command_time[device_id] = time.time()
+        self._last_command_time[device_id] = self._clock()
         self._update_state_cache(
             device_id,
             {
                 "AutoBrightness": enabled,
                 "ab": 1 if enabled else 0,
-                "Timestamp": int(time.time()),
+                "Timestamp": int(self._clock()),
             },
         )
         self._update_brightness_cache(device_id, "a_b", 1 if enabled else 0)
@@ -500,11 +503,11 @@ class MysaApi:
     async def set_min_brightness(self, device_id: str, value: int) -> None:
         """Set minimum brightness via HTTP."""
         # 0. IMMEDIATE OPTIMISTIC UPDATE
-        self._last_command_time[device_id] = time.time()
+        self._last_command_time[device_id] = self._clock()
         self._update_brightness_cache(device_id, "i_br", value)
         self._update_state_cache(
             device_id,
-            {"MinBrightness": value, "mnbr": value, "Timestamp": int(time.time())},
+            {"MinBrightness": value, "mnbr": value, "Timestamp": int(self._clock())},
         )
 
         # Trigger UI refresh NOW
@@ -520,11 +523,11 @@ class MysaApi:
     async def set_max_brightness(self, device_id: str, value: int) -> None:
         """Set maximum brightness via HTTP."""
         # 0. IMMEDIATE OPTIMISTIC UPDATE
-        self._last_command_time[device_id] = time.time()
+        self._last_command_time[device_id] = self._clock()
         self._update_brightness_cache(device_id, "a_br", value)
         self._update_state_cache(
             device_id,
-            {"MaxBrightness": value, "mxbr": value, "Timestamp": int(time.time())},
+            {"MaxBrightness": value, "mxbr": value, "Timestamp": int(self._clock())},
         )
 
         # Trigger UI refresh NOW
@@ -541,7 +544,7 @@ class MysaApi:
     async def set_ac_fan_speed(self, device_id: str, fan_mode: str) -> None:
         """Set AC fan speed."""
         # 0. IMMEDIATE OPTIMISTIC UPDATE
-        self._last_command_time[device_id] = time.time()
+        self._last_command_time[device_id] = self._clock()
         fan_val = AC_FAN_MODES_REVERSE.get(fan_mode.lower())
         if fan_val is None:
             return
@@ -552,7 +555,7 @@ class MysaApi:
                 "FanSpeed": {"v": fan_val},
                 "fn": fan_val,
                 "4": fan_val,
-                "Timestamp": int(time.time()),
+                "Timestamp": int(self._clock()),
             },
         )
 
@@ -573,7 +576,7 @@ class MysaApi:
     async def set_ac_swing_mode(self, device_id: str, swing_mode: str) -> None:
         """Set AC swing mode."""
         # 0. IMMEDIATE OPTIMISTIC UPDATE
-        self._last_command_time[device_id] = time.time()
+        self._last_command_time[device_id] = self._clock()
         swing_val = AC_SWING_MODES_REVERSE.get(swing_mode.lower())
         if swing_val is None:
             return
@@ -584,7 +587,7 @@ class MysaApi:
                 "SwingState": {"v": swing_val},
                 "ss": swing_val,
                 "5": swing_val,
-                "Timestamp": int(time.time()),
+                "Timestamp": int(self._clock()),
             },
         )
 
@@ -605,13 +608,13 @@ class MysaApi:
     async def set_ac_horizontal_swing(self, device_id: str, position: int) -> None:
         """Set AC horizontal swing position."""
         # 0. IMMEDIATE OPTIMISTIC UPDATE
-        self._last_command_time[device_id] = time.time()
+        self._last_command_time[device_id] = self._clock()
         self._update_state_cache(
             device_id,
             {
                 "SwingStateHorizontal": {"v": position},
                 "ssh": position,
-                "Timestamp": int(time.time()),
+                "Timestamp": int(self._clock()),
             },
         )
 
@@ -675,7 +678,7 @@ class MysaApi:
             device_id,
         )
 
-        timestamp = int(time.time())
+        timestamp = int(self._clock())
         body = {
             "Device": device_id.upper(),
             "Timestamp": timestamp,
@@ -710,7 +713,7 @@ class MysaApi:
         if device_id not in self.states:
             self.states[device_id] = {}
 
-        now = time.time()
+        now = self._clock()
         last_cmd_time = self._last_command_time.get(device_id, 0)
 
         # Timestamp-Based Freshness
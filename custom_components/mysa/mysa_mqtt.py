@@ -7,15 +7,24 @@ Used by both the Home Assistant integration and debug tool.
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
+import os
 import ssl
+from functools import lru_cache
+from string import ascii_lowercase, ascii_uppercase
 from types import TracebackType
 from typing import TYPE_CHECKING, Any
 from urllib.parse import urlparse
-from uuid import uuid1
 
 import websockets
 
+try:
+    from orjson import loads as _orjson_loads
+except ImportError:
+    # orjson ships with Home Assistant but is optional for the debug tool
+    _orjson_loads = None  # type: ignore[assignment]
+
 if TYPE_CHECKING:
     # Use Any to avoid version mismatch issues with websockets library
     WebSocketClientProtocol = Any
@@ -35,6 +44,22 @@ if TYPE_CHECKING:
 
 _LOGGER = logging.getLogger(__name__)
 
+# Device ID -> topic segment: strip MAC colons and lowercase in one pass
+_NORMALIZE_DEVICE_ID = str.maketrans(ascii_uppercase, ascii_lowercase, ":")
+
+
+def normalize_device_id(device_id: str) -> str:
+    """Normalize a device ID (MAC address) for use in MQTT topics.
+
+    Args:
+        device_id: Device ID, e.g. ``40:91:51:E4:0D:E0``
+
+    Returns:
+        Topic-safe device ID, e.g. ``409151e40de0``
+
+    """
+    return device_id.translate(_NORMALIZE_DEVICE_ID)
+
 
 def build_subscription_topics(
     device_ids: list[str], include_batch: bool = True
@@ -51,21 +76,55 @@ def build_subscription_topics(
     """
     sub_topics: list[mqtt.SubscriptionSpec] = []
     for device_id in device_ids:
-        safe_device_id = device_id.replace(":", "").lower()
-        sub_topics.extend(
-            [
-                mqtt.SubscriptionSpec(f"/v1/dev/{safe_device_id}/out", 0x01),
-                mqtt.SubscriptionSpec(f"/v1/dev/{safe_device_id}/in", 0x01),
-            ]
-        )
-        if include_batch:
-            sub_topics.append(
-                mqtt.SubscriptionSpec(f"/v1/dev/{safe_device_id}/batch", 0x00)
-            )
+        sub_topics.extend(_device_subscription_specs(device_id, include_batch))
     return sub_topics
 
 
-def parse_mqtt_packet(data: bytes | bytearray) -> Any | None:
+@lru_cache(maxsize=256)
+def _device_subscription_specs(
+    device_id: str, include_batch: bool
+) -> tuple[mqtt.SubscriptionSpec, ...]:
+    """Build (once) the subscription specs for a single device.
+
+    The same devices are resubscribed on every reconnect, so the normalized
+    topics and their encoded specs are cached per device ID.
+    """
+    safe_device_id = normalize_device_id(device_id)
+    specs: tuple[mqtt.SubscriptionSpec, ...] = (
+        mqtt.SubscriptionSpec(f"/v1/dev/{safe_device_id}/out", 0x01),
+        mqtt.SubscriptionSpec(f"/v1/dev/{safe_device_id}/in", 0x01),
+    )
+    if include_batch:
+        specs += (mqtt.SubscriptionSpec(f"/v1/dev/{safe_device_id}/batch", 0x00),)
+    return specs
+
+
+@lru_cache(maxsize=256)
+def extract_device_id(topic: str) -> str | None:
+    """Extract the device ID segment from a device topic.
+
+    Topics have the form ``/v1/dev/{device_id}/{out|in|batch}``. The segment
+    is located with ``str.find`` rather than splitting the whole topic, and
+    cached per topic since each device publishes on the same few topics.
+
+    Args:
+        topic: MQTT topic of a received PUBLISH
+
+    Returns:
+        Device ID segment, or None if the topic has no such segment
+
+    """
+    start = -1
+    for _ in range(3):
+        start = topic.find("/", start + 1)
+        if start < 0:
+            return None
+    end = topic.find("/", start + 1)
+    device_id = topic[start + 1 : end] if end >= 0 else topic[start + 1 :]
+    return device_id or None
+
+
+def parse_mqtt_packet(data: bytes | bytearray | memoryview) -> Any | None:
     """Parse MQTT packet from raw data.
 
     Args:
@@ -75,11 +134,46 @@ def parse_mqtt_packet(data: bytes | bytearray) -> Any | None:
         Parsed MQTT packet or None if parsing failed
 
     """
-    if not isinstance(data, bytearray):
-        data = bytearray(data)
+    msgs = parse_mqtt_packets(data)
+    return msgs[0] if msgs else None
+
+
+def parse_mqtt_packets(data: bytes | bytearray | memoryview) -> list[Any]:
+    """Parse every complete MQTT packet from raw data in one pass.
+
+    A single WebSocket frame may carry several MQTT packets.
+
+    Args:
+        data: Raw bytes from WebSocket
+
+    Returns:
+        List of parsed MQTT packets (empty if none are complete)
+
+    """
     msgs: list[Any] = []
     mqtt.parse(data, msgs)
-    return msgs[0] if msgs else None
+    return msgs
+
+
+def decode_payload(payload: bytes | bytearray | str) -> Any:
+    """Decode a JSON MQTT payload.
+
+    Uses orjson when available. Falls back to the stdlib decoder, which
+    also accepts the raw control characters some firmware embeds in strings.
+
+    Args:
+        payload: Raw PUBLISH payload
+
+    Returns:
+        Decoded JSON document
+
+    """
+    if _orjson_loads is not None:
+        try:
+            return _orjson_loads(payload)
+        except ValueError:
+            pass
+    return json.loads(payload, strict=False)
 
 
 def get_websocket_url(signed_url: str) -> str:
@@ -96,11 +190,27 @@ def get_websocket_url(signed_url: str) -> str:
     return url_parts._replace(scheme="wss").geturl()
 
 
-async def connect_websocket(signed_url: str) -> WebSocketClientProtocol:
+async def create_ssl_context() -> ssl.SSLContext:
+    """Create the TLS context for the MQTT WebSocket.
+
+    Loading the default CA bundle blocks, so it runs in the executor.
+
+    Returns:
+        Default client SSL context
+
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, ssl.create_default_context)
+
+
+async def connect_websocket(
+    signed_url: str, ssl_context: ssl.SSLContext | None = None
+) -> WebSocketClientProtocol:
     """Create WebSocket connection to MQTT broker.
 
     Args:
         signed_url: AWS SigV4 signed MQTT URL
+        ssl_context: TLS context, created here if not supplied
 
     Returns:
         WebSocket connection object
@@ -108,9 +218,8 @@ async def connect_websocket(signed_url: str) -> WebSocketClientProtocol:
     """
     ws_url = get_websocket_url(signed_url)
 
-    # Run synchronous SSL context creation in executor to avoid blocking event loop
-    loop = asyncio.get_running_loop()
-    ssl_context = await loop.run_in_executor(None, ssl.create_default_context)
+    if ssl_context is None:
+        ssl_context = await create_ssl_context()
 
     headers = {"user-agent": MQTT_USER_AGENT}
 
@@ -147,7 +256,7 @@ def create_connect_packet(keepalive: int = MQTT_KEEPALIVE) -> bytes:
         MQTT CONNECT packet bytes
 
     """
-    return mqtt.connect(str(uuid1()), keepalive)
+    return mqtt.connect(os.urandom(16).hex(), keepalive)
 
 
 def create_subscribe_packet(device_ids: list[str], packet_id: int = 1) -> bytes:
@@ -4,6 +4,8 @@ import asyncio
 import base64
 import json
 import logging
+import random
+import re
 import time
 from collections.abc import Callable
 from typing import Any, cast
@@ -11,12 +13,22 @@ from typing import Any, cast
 from homeassistant.core import HomeAssistant
 
 from . import mqtt
-from .const import MQTT_PING_INTERVAL
+from .const import (
+    MQTT_HANDSHAKE_TIMEOUT,
+    MQTT_INFLIGHT_TIMEOUT,
+    MQTT_INFLIGHT_WINDOW,
+    MQTT_PING_INTERVAL,
+)
 from .mysa_mqtt import (
     build_subscription_topics,
     connect_websocket,
     create_connect_packet,
+    create_ssl_context,
+    decode_payload,
+    extract_device_id,
+    normalize_device_id,
     parse_mqtt_packet,
+    parse_mqtt_packets,
 )
 from .readings import parse_batch_readings
 
@@ -27,6 +39,13 @@ SignedUrlCallback = Callable[[], Any]
 
 _LOGGER = logging.getLogger(__name__)
 
+# Fields reported in MsgType 4 log lines, keyed by their state name. A value
+# runs to the next label or the end of its line and may be empty.
+_LOG_FIELDS_RE = re.compile(
+    r"Local IP:\s*(?P<ip>(?:(?!Device Serial:)[^\n])*)"
+    r"|Device Serial:\s*(?P<serial_number>(?:(?!Local IP:)[^\n])*)"
+)
+
 
 class MysaRealtime:
     """Mysa MQTT Realtime Coordinator."""
@@ -50,7 +69,31 @@ class MysaRealtime:
         self._mqtt_ws: Any = None  # ws object from `connect_websocket`
         self._mqtt_should_reconnect = True
         self._mqtt_reconnect_delay = 1.0
+        self._mqtt_reconnect_max = 60.0
+        self._mqtt_handshake_timeout = MQTT_HANDSHAKE_TIMEOUT
+        # Keepalive clock: monotonic like the event loop's, immune to NTP/DST jumps
+        self._monotonic: Callable[[], float] = time.monotonic
         self._devices_ids: list[str] = []  # List of device IDs to subscribe to
+        # The listener reconnects with the same client ID, so encode CONNECT once
+        self._connect_pkt = create_connect_packet()
+
+        # QoS 1 commands in flight on the persistent connection, by packet ID.
+        # Packet ID 1 is left to the handshake SUBSCRIBE.
+        self._last_packet_id = 1
+        self._pending_acks: dict[int, asyncio.Future[None]] = {}
+        self._inflight_window = asyncio.Semaphore(MQTT_INFLIGHT_WINDOW)
+        # A stalled broker must not hold commands forever; one-off takes over
+        self._inflight_timeout = MQTT_INFLIGHT_TIMEOUT
+
+        # Message types with their own extractor; the rest carry state in body
+        self._special_handlers: dict[
+            int | None, Callable[[dict[str, Any]], dict[str, Any] | None]
+        ] = {
+            10: self._extract_boot_info,
+            4: self._extract_log_info,
+            3: self._extract_batch_info,
+            61: self._extract_firmware_report,
+        }
 
     @property
     def is_running(self) -> bool:
@@ -125,44 +168,50 @@ class MysaRealtime:
             except Exception as e:  # pylint: disable=broad-except
                 # Justification: Catch-all to ensure the listener loop keeps running despite
                 # unexpected errors.
+                # Jitter spreads out clients that all lost the broker at once
+                sleep_delay = random.uniform(reconnect_delay / 2, reconnect_delay)
                 if not first_failure_logged:
                     _LOGGER.warning(
                         "MQTT connection lost: %s. Will retry in background (reconnecting in %ds)",
                         e,
-                        int(reconnect_delay),
+                        int(sleep_delay),
                     )
                     first_failure_logged = True
                 else:
                     _LOGGER.debug(
                         "MQTT connection lost: %s, reconnecting in %ds",
                         e,
-                        int(reconnect_delay),
+                        int(sleep_delay),
                     )
 
                 self._mqtt_connected.clear()
-                await asyncio.sleep(reconnect_delay)
+                await asyncio.sleep(sleep_delay)
 
                 # Fibonacci backoff
-                next_delay = reconnect_delay + (
-                    prev_delay if "prev_delay" in locals() else 0
-                )
+                next_delay = reconnect_delay + prev_delay
                 prev_delay = reconnect_delay
-                reconnect_delay = min(next_delay, 60.0)
+                reconnect_delay = min(next_delay, self._mqtt_reconnect_max)
 
     async def _mqtt_listen(self) -> None:
         """Establish MQTT connection and listen for updates."""
-        # Get signed URL via callback
-        signed_url = await self._get_signed_url()
+        # Get signed URL via callback while the TLS context loads in the executor
+        signed_url, ssl_context = await asyncio.gather(
+            self._get_signed_url(), create_ssl_context()
+        )
 
         # If we are here, we are attempting to connect.
         _LOGGER.debug("Connecting to MQTT for persistent listening...")
 
         # Connect
-        ws = await connect_websocket(signed_url)
+        ws = await connect_websocket(signed_url, ssl_context)
         self._mqtt_ws = ws
 
         try:
-            await self._perform_mqtt_handshake(ws)
+            # A broker that accepts the socket but never acks must not hang us
+            await asyncio.wait_for(
+                self._perform_mqtt_handshake(ws),
+                timeout=self._mqtt_handshake_timeout,
+            )
             self._mqtt_connected.set()
             await self._run_mqtt_loop(ws)
         except Exception as listen_error:
@@ -174,6 +223,10 @@ class MysaRealtime:
         finally:
             self._mqtt_ws = None
             self._mqtt_connected.clear()
+            # PUBACKs can't arrive on a new connection; free the window
+            for ack in self._pending_acks.values():
+                ack.cancel()
+            self._pending_acks.clear()
             try:
                 await ws.close()
             except Exception:
@@ -182,8 +235,7 @@ class MysaRealtime:
     async def _perform_mqtt_handshake(self, ws: Any) -> None:
         """Perform MQTT connect and subscribe handshake."""
         # Connect
-        connect_pkt = create_connect_packet()
-        await ws.send(connect_pkt)
+        await ws.send(self._connect_pkt)
 
         # Connack
         resp = await ws.recv()
@@ -208,72 +260,132 @@ class MysaRealtime:
                 pkt = parse_mqtt_packet(resp)
                 if not isinstance(pkt, mqtt.SubackPacket):
                     raise RuntimeError(f"Expected SUBACK, got {pkt}")
+                # One return code per topic; 0x80 and above is a refusal
+                if len(pkt.return_codes) != len(sub_topics) or any(
+                    code >= 0x80 for code in pkt.return_codes
+                ):
+                    raise RuntimeError(f"Subscription rejected: {pkt.return_codes}")
 
                 _LOGGER.debug("Subscribed to %d device topics", len(self._devices_ids))
 
     async def _run_mqtt_loop(self, ws: Any) -> None:
         """Run the main MQTT message and keepalive loop."""
-        last_ping = time.time()
+        last_ping = self._monotonic()
         ping_interval = MQTT_PING_INTERVAL
+        # One recv stays pending across keepalive wakeups instead of being
+        # restarted (and its timeout raised) every iteration
+        recv_task: asyncio.Future[Any] | None = None
 
-        while True:
-            try:
-                elapsed = time.time() - last_ping
-                time_until_ping = max(0.1, ping_interval - elapsed)
+        try:
+            while True:
+                if recv_task is None:
+                    recv_task = asyncio.ensure_future(ws.recv())
 
-                msg = await asyncio.wait_for(
-                    ws.recv(), timeout=min(time_until_ping, 20.0)
+                time_until_ping = max(
+                    0.0, ping_interval - (self._monotonic() - last_ping)
+                )
+                done, _ = await asyncio.wait(
+                    (recv_task,), timeout=min(time_until_ping, 20.0)
                 )
 
-                try:
-                    pkt = parse_mqtt_packet(msg)
-                    if pkt:
-                        if isinstance(pkt, mqtt.PublishPacket):
-                            await self._process_mqtt_publish(pkt)
-                        elif (
-                            hasattr(pkt, "pkt_type")
-                            and pkt.pkt_type == mqtt.MQTT_PACKET_PINGRESP
-                        ):
-                            _LOGGER.debug("Received PINGRESP")
-                except Exception as parse_error:
-                    _LOGGER.warning(
-                        "Error parsing MQTT packet: %s", parse_error, exc_info=True
-                    )
+                if done:
+                    try:
+                        msg = recv_task.result()
+                    except Exception as recv_error:
+                        _LOGGER.error(
+                            "Error receiving MQTT message: %s",
+                            recv_error,
+                            exc_info=True,
+                        )
+                        raise
+                    finally:
+                        recv_task = None
+                    await self._handle_mqtt_frame(msg)
+
+                if self._monotonic() - last_ping >= ping_interval:
+                    try:
+                        await ws.send(mqtt.pingreq())
+                        last_ping = self._monotonic()
+                        _LOGGER.debug("Sent PINGREQ keepalive")
+                    except Exception as e:
+                        _LOGGER.error(
+                            "Failed to send keepalive ping: %s", e, exc_info=True
+                        )
+                        raise
+        finally:
+            if recv_task is not None:
+                recv_task.cancel()
 
-            except TimeoutError:
-                pass
-            except Exception as recv_error:
-                _LOGGER.error(
-                    "Error receiving MQTT message: %s", recv_error, exc_info=True
-                )
-                raise
+    async def _handle_mqtt_frame(self, msg: Any) -> None:
+        """Dispatch every MQTT packet in one WebSocket frame."""
+        try:
+            for pkt in parse_mqtt_packets(msg):
+                if isinstance(pkt, mqtt.PublishPacket):
+                    await self._process_mqtt_publish(pkt)
+                elif isinstance(pkt, mqtt.PubackPacket):
+                    self._resolve_puback(pkt.packet_id)
+                elif (
+                    hasattr(pkt, "pkt_type")
+                    and pkt.pkt_type == mqtt.MQTT_PACKET_PINGRESP
+                ):
+                    _LOGGER.debug("Received PINGRESP")
+        except Exception as parse_error:
+            _LOGGER.warning("Error parsing MQTT packet: %s", parse_error, exc_info=True)
+
+    def _resolve_puback(self, packet_id: int) -> None:
+        """Mark a command acknowledged, freeing its in-flight slot."""
+        ack = self._pending_acks.pop(packet_id, None)
+        if ack and not ack.done():
+            ack.set_result(None)
+
+    def _next_packet_id(self) -> int:
+        """Return the next packet ID not awaiting a PUBACK (wraps past 0xFFFF)."""
+        packet_id = self._last_packet_id
+        while True:
+            packet_id = packet_id + 1 if packet_id < 0xFFFF else 2
+            if packet_id not in self._pending_acks:
+                self._last_packet_id = packet_id
+                return packet_id
 
-            if time.time() - last_ping >= ping_interval:
-                try:
-                    await ws.send(mqtt.pingreq())
-                    last_ping = time.time()
-                    _LOGGER.debug("Sent PINGREQ keepalive")
-                except Exception as e:
-                    _LOGGER.error("Failed to send keepalive ping: %s", e, exc_info=True)
-                    raise
+    async def _publish_inflight(self, ws: Any, topic: str, payload: bytes) -> None:
+        """Publish at QoS 1 once a slot in the in-flight window is free."""
+        try:
+            await asyncio.wait_for(
+                self._inflight_window.acquire(), timeout=self._inflight_timeout
+            )
+        except TimeoutError as err:
+            raise TimeoutError(
+                f"No in-flight slot within MQTT_INFLIGHT_TIMEOUT "
+                f"({self._inflight_timeout}s): "
+                f"{len(self._pending_acks)} commands still awaiting PUBACK"
+            ) from err
+        packet_id = self._next_packet_id()
+        ack: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        ack.add_done_callback(lambda _: self._inflight_window.release())
+        self._pending_acks[packet_id] = ack
+        try:
+            await ws.send(
+                mqtt.publish(
+                    topic, False, 1, False, packet_id=packet_id, payload=payload
+                )
+            )
+        except Exception:
+            self._pending_acks.pop(packet_id, None)
+            ack.cancel()
+            raise
 
     async def _process_mqtt_publish(self, pkt: Any) -> None:
         """Process an MQTT publish packet."""
         try:
-            payload = json.loads(pkt.payload, strict=False)
+            payload = decode_payload(pkt.payload)
             topic = pkt.topic
             _LOGGER.debug("Received MQTT message on %s: %s", topic, payload)
 
-            # Extract Device ID logic -- maybe move to utility or keep here
             # Topic format: /v1/dev/{device_id}/out
-            topic_parts = topic.split("/")
-            device_id = None
-            if len(topic_parts) >= 4:
-                safe_id = topic_parts[3]
-                # We need to map safe_id back to real ID if they differ (colons)
-                # Currently simple normalization is done in api.py.
-                # Here we default to safe_id.
-                device_id = safe_id
+            # We need to map safe_id back to real ID if they differ (colons)
+            # Currently simple normalization is done in api.py.
+            # Here we default to safe_id.
+            device_id = extract_device_id(topic)
 
             if device_id:
                 # Extract state
@@ -292,26 +404,19 @@ class MysaRealtime:
         except (ValueError, TypeError):
             msg_type = None
 
-        # Dispatch based on special message types
-        special_handlers: dict[
-            int, Callable[[dict[str, Any]], dict[str, Any] | None]
-        ] = {
-            10: self._extract_boot_info,
-            4: self._extract_log_info,
-            3: self._extract_batch_info,
-            61: lambda p: cast(
-                dict[str, Any] | None, {"FirmwareVersion": str(p.get("version", ""))}
-            ),
-        }
-        if msg_type is not None and msg_type in special_handlers:
-            return special_handlers[msg_type](payload)
+        # Dispatch based on special message types; MsgType 30 (periodic
+        # telemetry) is the bulk of traffic and never has one
+        if msg_type != 30:
+            handler = self._special_handlers.get(msg_type)
+            if handler is not None:
+                return handler(payload)
 
         # Standard processing
         msg_ts = payload.get("time") or payload.get("Timestamp")
         update: dict[str, Any] = {}
         body = payload.get("body")
 
-        if msg_type == 30 and body or body:
+        if body:
             update = self._extract_body_state(body) or {}
 
         # Timestamp and metadata
@@ -342,20 +447,20 @@ class MysaRealtime:
 
         return update
 
+    def _extract_firmware_report(
+        self, payload: dict[str, Any]
+    ) -> dict[str, Any] | None:
+        """Extract info from MsgType 61."""
+        return {"FirmwareVersion": str(payload.get("version", ""))}
+
     def _extract_log_info(self, payload: dict[str, Any]) -> dict[str, Any] | None:
         """Extract info from MsgType 4."""
         message = payload.get("Message", "")
         update = {}
-        if "Local IP:" in message:
-            temp = message.split("Local IP:")[-1]
-            if "Device Serial:" in temp:
-                temp = temp.split("Device Serial:")[0]
-            update["ip"] = temp.strip()
-        if "Device Serial:" in message:
-            temp = message.split("Device Serial:")[-1]
-            if "Local IP:" in temp:
-                temp = temp.split("Local IP:")[0]
-            update["serial_number"] = temp.strip()
+        # Single pass; a later occurrence of a field overrides an earlier one
+        for match in _LOG_FIELDS_RE.finditer(message):
+            key = cast(str, match.lastgroup)
+            update[key] = match.group(key).strip()
 
         return update if update else None
 
@@ -393,11 +498,13 @@ class MysaRealtime:
 
         cmd_list = body.get("cmd")
         if isinstance(cmd_list, list):
-            combined = {}
-            for item in cmd_list:
-                if isinstance(item, dict):
-                    combined.update(item)
-            return combined
+            # Entries may carry several keys (e.g. {"md": 3, "tm": -1})
+            return {
+                key: value
+                for item in cmd_list
+                if isinstance(item, dict)
+                for key, value in item.items()
+            }
 
         # Fallback: if no state/cmd, use body itself
         return cast(dict[str, Any], body)
@@ -444,15 +551,14 @@ class MysaRealtime:
                     outer_payload = payload
 
                 json_payload = json.dumps(outer_payload)
-                safe_device_id = device_id.replace(":", "").lower()
+                safe_device_id = normalize_device_id(device_id)
                 topic = f"/v1/dev/{safe_device_id}/in"
 
                 # 2. Publish
                 # Note: We use QoS 1 for commands to ensure delivery
-                pub_pkt = mqtt.publish(
-                    topic, False, 1, False, packet_id=7, payload=json_payload.encode()
+                await self._publish_inflight(
+                    self._mqtt_ws, topic, json_payload.encode()
                 )
-                await self._mqtt_ws.send(pub_pkt)
                 return  # Success
             except Exception as e:
                 _LOGGER.warning(
@@ -504,7 +610,7 @@ class MysaRealtime:
             outer_payload = payload
 
         json_payload = json.dumps(outer_payload)
-        safe_device_id = device_id.replace(":", "").lower()
+        safe_device_id = normalize_device_id(device_id)
         topic = f"/v1/dev/{safe_device_id}/in"
 
         _LOGGER.debug("Sending one-off MQTT command to %s: %s", topic, json_payload)
@@ -538,7 +644,7 @@ class MysaRealtime:
                         resp = resp.encode()
                     pkt = parse_mqtt_packet(resp)
                     if isinstance(pkt, mqtt.PublishPacket):
-                        resp_payload = json.loads(pkt.payload, strict=False)
+                        resp_payload = decode_payload(pkt.payload)
                         # Process response
                         state_update = self._extract_state_update(resp_payload)
                         if state_update:
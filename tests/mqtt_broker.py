@@ -8,6 +8,7 @@ import asyncio
 import json
 import logging
 import time
+from collections import deque
 from dataclasses import dataclass, field
 
 _LOGGER = logging.getLogger(__name__)
@@ -30,7 +31,9 @@ class MockMqttClient:
     client_id: str
     broker: "MockMqttBroker"
     subscriptions: list[str] = field(default_factory=list)
-    message_queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    # deque + Event rather than asyncio.Queue: delivery is a plain append
+    messages: deque[MockMqttMessage] = field(default_factory=deque)
+    message_event: asyncio.Event = field(default_factory=asyncio.Event)
     connected: bool = False
 
     async def connect(self):
@@ -58,12 +61,20 @@ class MockMqttClient:
         msg = MockMqttMessage(topic=topic, payload=payload, qos=qos, retain=retain)
         await self.broker.route_message(msg, sender=self.client_id)
 
+    def deliver(self, msg: MockMqttMessage):
+        """Queue a routed message for this client."""
+        self.messages.append(msg)
+        self.message_event.set()
+
     async def receive(self, timeout: float = 5.0) -> MockMqttMessage | None:
         """Receive a message from subscribed topics."""
-        try:
-            return await asyncio.wait_for(self.message_queue.get(), timeout=timeout)
-        except TimeoutError:
-            return None
+        if not self.messages:
+            self.message_event.clear()
+            try:
+                await asyncio.wait_for(self.message_event.wait(), timeout=timeout)
+            except TimeoutError:
+                return None
+        return self.messages.popleft()
 
 
 class MockMqttBroker:
@@ -113,7 +124,7 @@ class MockMqttBroker:
 
             for sub_topic in client.subscriptions:
                 if self._topic_matches(sub_topic, msg.topic):
-                    await client.message_queue.put(msg)
+                    client.deliver(msg)
                     break
 
     async def inject_message(
@@ -36,6 +36,7 @@ def mock_api(mock_hass):
     api.devices = {"dev1": {"type": 4, "Model": "BB-V2", "SupportedCaps": {}}}
     api.states = {"dev1": {}}
     api._last_command_time = {}
+    api._clock = time.time
 
     def mock_async_create_task(coro):
         """Close coroutine to avoid unawaited warnings."""
@@ -774,22 +775,22 @@ class TestMysaApi:
         api.states = {"dev1": {}}  # Missing FirmwareVersion and IP
 
         # 1. First trigger - should nudge
-        with patch("time.time", return_value=1000.0):
-            await api._on_mqtt_update("dev1", {"temp": 20})
-            api.update_request.assert_called_once_with("dev1")
-            assert api._metadata_requested["dev1"] == 1000.0
+        api._clock = lambda: 1000.0
+        await api._on_mqtt_update("dev1", {"temp": 20})
+        api.update_request.assert_called_once_with("dev1")
+        assert api._metadata_requested["dev1"] == 1000.0
 
         # 2. Second trigger immediately - should NOT nudge (backoff)
         api.update_request.reset_mock()
-        with patch("time.time", return_value=1010.0):
-            await api._on_mqtt_update("dev1", {"temp": 21})
-            api.update_request.assert_not_called()
+        api._clock = lambda: 1010.0
+        await api._on_mqtt_update("dev1", {"temp": 21})
+        api.update_request.assert_not_called()
 
         # 3. Third trigger after timeout - should nudge again
-        with patch("time.time", return_value=1400.0):  # > 300s later
-            await api._on_mqtt_update("dev1", {"temp": 22})
-            api.update_request.assert_called_once_with("dev1")
-            assert api._metadata_requested["dev1"] == 1400.0
+        api._clock = lambda: 1400.0  # > 300s later
+        await api._on_mqtt_update("dev1", {"temp": 22})
+        api.update_request.assert_called_once_with("dev1")
+        assert api._metadata_requested["dev1"] == 1400.0
 
         # 4. Device HAS metadata - should NOT nudge
         api.update_request.reset_mock()
@@ -806,10 +807,10 @@ class TestMysaApi:
         # Case: Firmware OK, IP Missing -> Should Nudge
         api.states["dev3"] = {"FirmwareVersion": "1.0.0"}  # No IP
 
-        with patch("time.time", return_value=2000.0):
-            await api._on_mqtt_update("dev3", {"temp": 20})
-            api.update_request.assert_called_once_with("dev3")
-            assert api._metadata_requested["dev3"] == 2000.0
+        api._clock = lambda: 2000.0
+        await api._on_mqtt_update("dev3", {"temp": 20})
+        api.update_request.assert_called_once_with("dev3")
+        assert api._metadata_requested["dev3"] == 2000.0
 
 
 # --- Merged from test_brightness_logic.py ---
@@ -1041,3 +1042,16 @@ async def test_timestamp_prevents_stale_update_explicit(mock_hass):
     update_data_same = {"stpt": 25.0, "Timestamp": 2000}
     api._update_state_cache(dev_id, update_data_same, filter_stale=True)
     assert "stpt" not in api.states[dev_id]
+
+
+@pytest.mark.asyncio
+async def test_injected_clock_stamps_mqtt_updates(mock_hass):
+    """Test that a clock passed to MysaApi replaces time.time."""
+    with patch("custom_components.mysa.mysa_api.ClientSession"):
+        api = MysaApi("user", "pass", mock_hass, clock=lambda: 1234.0)
+    api.devices = {"d1": {"Id": "d1", "Model": "BB-V2"}}
+    api.states = {"d1": {"FirmwareVersion": "1.0.0", "ip": "1.2.3.4"}}
+
+    await api._on_mqtt_update("d1", {"temp": 20})
+
+    assert api._last_command_time["d1"] == 1234.0
@@ -3,14 +3,6 @@
 Tests for mysa_auth.py: async Cognito authentication.
 """
 
-import os
-import sys
-
-# Add project root to path for imports
-TEST_DIR = os.path.dirname(os.path.abspath(__file__))
-ROOT_DIR = os.path.dirname(TEST_DIR)
-sys.path.insert(0, ROOT_DIR)
-
 from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
 
 import pytest
@@ -3,8 +3,6 @@
 Tests for custom_components/mysa/binary_sensor.py
 """
 
-import os
-import sys
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock
 
@@ -20,11 +18,6 @@ from custom_components.mysa.binary_sensor import (
 )
 from custom_components.mysa.const import DOMAIN
 
-# Add project root to path for imports
-TEST_DIR = os.path.dirname(os.path.abspath(__file__))
-ROOT_DIR = os.path.dirname(TEST_DIR)
-sys.path.insert(0, ROOT_DIR)
-
 
 @pytest.fixture
 def mock_coordinator(hass, mock_config_entry):
@@ -4,15 +4,8 @@ Tests that instantiate and test real climate entity classes
 to improve code coverage for climate.py.
 """
 
-import os
-import sys
 import time
 
-# Add project root to path for imports
-TEST_DIR = os.path.dirname(os.path.abspath(__file__))
-ROOT_DIR = os.path.dirname(TEST_DIR)
-sys.path.insert(0, ROOT_DIR)
-
 from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
 
 import pytest
@@ -25,7 +18,6 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from custom_components.mysa import MysaData
 
-# Module-level imports after path setup
 from custom_components.mysa.const import (
     AC_MODE_AUTO,
     AC_MODE_COOL,
@@ -3,20 +3,12 @@
 Tests for config_flow.py: ConfigFlow and MysaOptionsFlowHandler
 """
 
-import os
-import sys
 from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
 
 import pytest
 from homeassistant import config_entries
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
 
-# Add project root to path for imports
-TEST_DIR = os.path.dirname(os.path.abspath(__file__))
-ROOT_DIR = os.path.dirname(TEST_DIR)
-sys.path.insert(0, ROOT_DIR)
-
-# Module-level imports after path setup
 from custom_components.mysa.const import DOMAIN
 from tests.conftest import MockConfigEntry
 
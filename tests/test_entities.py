@@ -4,14 +4,6 @@ Tests for number.py, switch.py, select.py, update.py:
 async_setup_entry, entity actions, and edge cases.
 """
 
-import os
-import sys
-
-# Add project root to path for imports
-TEST_DIR = os.path.dirname(os.path.abspath(__file__))
-ROOT_DIR = os.path.dirname(TEST_DIR)
-sys.path.insert(0, ROOT_DIR)
-
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -21,7 +13,6 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from custom_components.mysa import MysaData
 
-# Module-level imports after path setup
 from custom_components.mysa.const import DOMAIN
 
 # ===========================================================================
@@ -1825,16 +1816,11 @@ class TestMysaUpdateEntities:
 # From test_device_entity.py
 # ===========================================================================
 
-ROOT_DIR = os.path.dirname(TEST_DIR)
-sys.path.insert(0, ROOT_DIR)
-
 import pytest
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-# Module-level imports after path setup
-
 
 class TestDeviceRegistry:
     """Test device registry patterns."""
@@ -2102,9 +2088,6 @@ class TestIntegrationHelpers:
 # From test_entity_integration.py
 # ===========================================================================
 
-ROOT_DIR = os.path.dirname(TEST_DIR)
-sys.path.insert(0, ROOT_DIR)
-
 import pytest
 from homeassistant.components.climate import ClimateEntityFeature, HVACMode
 
@@ -7,14 +7,7 @@ Tests using pytest-homeassistant-custom-component advanced features:
 - Service call testing
 """
 
-import os
-import sys
-
-# Add project root to path for imports
-TEST_DIR = os.path.dirname(os.path.abspath(__file__))
-ROOT_DIR = os.path.dirname(TEST_DIR)
-sys.path.insert(0, ROOT_DIR)
-
+import time
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -24,7 +17,6 @@ from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-# Module-level imports after path setup
 from custom_components.mysa.const import DOMAIN
 from custom_components.mysa.mysa_api import MysaApi
 
@@ -282,11 +274,6 @@ class TestMockConfigEntryLifecycle:
 # --- From test_ha_advanced.py ---
 
 
-# Add project root to path for imports
-TEST_DIR = os.path.dirname(os.path.abspath(__file__))
-ROOT_DIR = os.path.dirname(TEST_DIR)
-sys.path.insert(0, ROOT_DIR)
-
 import logging
 from datetime import timedelta
 
@@ -296,8 +283,6 @@ from pytest_homeassistant_custom_component.common import (
     async_fire_time_changed,
 )
 
-# Module-level imports after path setup
-
 
 class TestAioClientMock:
     """Test HTTP mocking with aioclient_mock."""
@@ -542,9 +527,6 @@ class TestUpdateCoordinatorAdvanced:
 
 # --- From test_end_to_end.py ---
 
-ROOT_DIR = os.path.dirname(TEST_DIR)
-sys.path.insert(0, ROOT_DIR)
-
 import pytest
 
 
@@ -703,6 +685,7 @@ class TestCommandFlowAsync:
 
         api = MysaApi.__new__(MysaApi)
         api.hass = hass
+        api._clock = time.time
         api.client = MagicMock()
         api.client.devices = {"device1": {"type": 4}}
         api.client.user_id = "test-user-id"
@@ -731,6 +714,7 @@ class TestCommandFlowAsync:
 
         api = MysaApi.__new__(MysaApi)
         api.hass = hass
+        api._clock = time.time
         api.client = MagicMock()
         api.client.devices = {"device1": {"type": 4}}
         api.client.user_id = "test-user-id"
@@ -3,23 +3,27 @@
 Tests for mqtt.py: packet builders and parsers, edge cases for full coverage.
 """
 
-import os
-import sys
-
-# Add project root to path for imports
-TEST_DIR = os.path.dirname(os.path.abspath(__file__))
-ROOT_DIR = os.path.dirname(TEST_DIR)
-sys.path.insert(0, ROOT_DIR)
-
+import importlib
 import json
 import struct
+import sys
+from dataclasses import FrozenInstanceError
 from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-# Module-level imports after path setup
+import custom_components.mysa
+from custom_components.mysa import mysa_mqtt
 from custom_components.mysa.mqtt import (
+    MQTT_PACKET_CONNACK,
+    MQTT_PACKET_CONNECT,
+    MQTT_PACKET_DISCONNECT,
+    MQTT_PACKET_PINGREQ,
+    MQTT_PACKET_PINGRESP,
+    MQTT_PACKET_PUBLISH,
+    MQTT_PACKET_SUBACK,
+    MQTT_PACKET_SUBSCRIBE,
     ConnackPacket,
     PingrespPacket,
     PubackPacket,
@@ -35,6 +39,17 @@ from custom_components.mysa.mqtt import (
     publish,
     subscribe,
 )
+from custom_components.mysa.mysa_mqtt import (
+    build_subscription_topics,
+    extract_device_id,
+)
+
+# Shared parser fixtures (parse accepts bytes; copy to bytearray only if mutated)
+_CONNACK_OK = b"\x20\x02\x00\x00"
+_SUBACK = b"\x90\x03\x00\x01\x01"
+_PUBACK_123 = b"\x40\x02\x00\x7b"
+_PINGRESP = b"\xd0\x00"
+_UNKNOWN_TYPE = b"\x70\x00"  # Unhandled type 7
 
 
 class TestImportFallback:
@@ -42,54 +57,49 @@ class TestImportFallback:
 
     def test_import_fallback(self):
         """Test fallback to direct imports when relative imports fail."""
-
-        # Save original modules
-        original_modules = sys.modules.copy()
-
-        try:
-            # Cleanup for test
-            if "custom_components.mysa.mysa_mqtt" in sys.modules:
-                del sys.modules["custom_components.mysa.mysa_mqtt"]
-
-            real_import = __import__
-            triggered = {"val": False}
-
-            def side_effect(name, globals=None, locals=None, fromlist=(), level=0):
-                # Trigger on relative import of mqtt
-                if level > 0 and fromlist and "mqtt" in fromlist:
-                    triggered["val"] = True
-                    raise ImportError("Simulated relative import failure")
-                return real_import(name, globals, locals, fromlist, level)
+        real_import = __import__
+        triggered = {"val": False}
+
+        def side_effect(name, globals=None, locals=None, fromlist=(), level=0):
+            # Trigger on relative import of mqtt
+            if level > 0 and fromlist and "mqtt" in fromlist:
+                triggered["val"] = True
+                raise ImportError("Simulated relative import failure")
+            return real_import(name, globals, locals, fromlist, level)
+
+        # Prepare fallback mocks
+        mock_mqtt = MagicMock()
+        mock_mqtt.connect = MagicMock(return_value="FALLBACK_CONNECT")
+
+        mock_const = MagicMock()
+        mock_const.MQTT_KEEPALIVE = 60
+        mock_const.MQTT_USER_AGENT = "test-agent"
+
+        # patch.dict snapshots sys.modules and restores it exactly on exit,
+        # dropping anything the reload added; patch.object puts the package
+        # attribute back so later tests see the original module.
+        with (
+            patch.dict(sys.modules),
+            patch.object(custom_components.mysa, "mysa_mqtt", mysa_mqtt),
+        ):
+            del sys.modules["custom_components.mysa.mysa_mqtt"]
+
+            # Mock the fallback modules (mqtt, const)
+            # These are ABSOLUTE imports in the fallback block
+            sys.modules["mqtt"] = mock_mqtt
+            sys.modules["const"] = mock_const
 
             with patch("builtins.__import__", side_effect=side_effect):
-                # Prepare fallback mocks
-                mock_mqtt = MagicMock()
-                mock_mqtt.connect = MagicMock(return_value="FALLBACK_CONNECT")
-
-                mock_const = MagicMock()
-                mock_const.MQTT_KEEPALIVE = 60
-                mock_const.MQTT_USER_AGENT = "test-agent"
-
-                # Mock the fallback modules (mqtt, const)
-                # These are ABSOLUTE imports in the fallback block
-                fallback_mocks = {
-                    "mqtt": mock_mqtt,
-                    "const": mock_const,
-                }
-
-                with patch.dict(sys.modules, fallback_mocks):
-                    import custom_components.mysa.mysa_mqtt
+                module = importlib.import_module("custom_components.mysa.mysa_mqtt")
 
-                    # Verify we triggered the error
-                    assert triggered["val"], "Relative import was not intercepted!"
+            # Verify we triggered the error
+            assert triggered["val"], "Relative import was not intercepted!"
 
-                    # Verify we used the fallback by calling a function that uses mqtt module
-                    res = custom_components.mysa.mysa_mqtt.create_connect_packet()
-                    assert res == "FALLBACK_CONNECT"
+            # Verify we used the fallback by calling a function that uses mqtt module
+            assert module.create_connect_packet() == "FALLBACK_CONNECT"
 
-        finally:
-            # Restore original modules
-            sys.modules.update(original_modules)
+        assert sys.modules["custom_components.mysa.mysa_mqtt"] is mysa_mqtt
+        assert "mqtt" not in sys.modules
 
 
 # ===========================================================================
@@ -106,18 +116,17 @@ class TestPacketBuilders:
 
         assert pkt[0] == 0x10  # CONNECT type
         assert b"MQTT" in pkt
-
-    def test_pingreq_packet(self):
-        """Test pingreq packet creation."""
-        pkt = pingreq()
-
-        assert pkt == b"\xc0\x00"
-
-    def test_disconnect_packet(self):
-        """Test disconnect packet creation."""
-        pkt = disconnect()
-
-        assert pkt[0] == 0xE0  # DISCONNECT type
+        # Variable header: protocol name, level 4, clean session, keepalive
+        assert pkt[2:12] == b"\x00\x04MQTT\x04\x02\x00\x3c"
+
+    @pytest.mark.parametrize(
+        ("factory", "expected"),
+        [(pingreq, b"\xc0\x00"), (disconnect, b"\xe0\x00")],
+        ids=["pingreq", "disconnect"],
+    )
+    def test_fixed_packets(self, factory, expected):
+        """Test packets with no variable header or payload."""
+        assert factory() == expected
 
     def test_subscribe_packet(self):
         """Test subscribe packet creation."""
@@ -126,6 +135,23 @@ class TestPacketBuilders:
 
         assert pkt[0] == 0x82  # SUBSCRIBE type with flags
 
+    def test_subscribe_packet_layout(self):
+        """Test subscribe packet concatenates every spec after the packet id."""
+        specs = [SubscriptionSpec("a/out", 1), SubscriptionSpec("a/in", 0)]
+        pkt = subscribe(0x0102, specs)
+
+        body = b"\x01\x02" + specs[0].to_bytes() + specs[1].to_bytes()
+        assert pkt == b"\x82" + bytes([len(body)]) + body
+
+    def test_subscribe_packet_multibyte_length(self):
+        """Test subscribe packet with a remaining length above 127."""
+        specs = [SubscriptionSpec(f"/v1/dev/{i:012x}/out", 1) for i in range(10)]
+        pkt = subscribe(1, specs)
+
+        remaining = 2 + sum(s.remaining_len() for s in specs)
+        assert pkt[1:3] == _encode_remaining_length(remaining)
+        assert len(pkt) == 3 + remaining
+
     def test_publish_qos0(self):
         """Test publish packet with QoS 0."""
         pkt = publish("test/topic", False, 0, False, b"payload")
@@ -138,6 +164,13 @@ class TestPacketBuilders:
 
         assert (pkt[0] & 0x06) == 0x02  # QoS 1 flag
 
+    def test_publish_layout_utf8_topic(self):
+        """Test publish length fields count encoded topic bytes."""
+        pkt = publish("é", False, 1, False, b"{}", packet_id=5)
+
+        # remaining = topic prefix (2) + topic (2 bytes) + packet id (2) + payload
+        assert pkt == b"\x32\x08\x00\x02\xc3\xa9\x00\x05{}"
+
     def test_publish_qos1_no_packet_id_error(self):
         """Test publish with QoS > 0 and no packet_id raises error."""
         with pytest.raises(ValueError, match="QoS > 0 requires a packet_id"):
@@ -202,6 +235,37 @@ class TestSubscriptionSpec:
 
         # Should have length prefix + topic + QoS
         assert len(data) == 2 + len("test/topic") + 1
+        assert data == b"\x00\x0atest/topic\x01"
+
+    def test_encoding_cached(self):
+        """Test the encoded form is computed once and reused."""
+        spec = SubscriptionSpec("/v1/dev/é/out", 1)
+
+        assert spec.to_bytes() is spec.to_bytes()
+        assert spec.remaining_len() == 3 + len("/v1/dev/é/out".encode())
+
+    def test_equality_ignores_cache(self):
+        """Test specs compare and print by topic and QoS only."""
+        spec = SubscriptionSpec("test/topic", 1)
+
+        assert spec == SubscriptionSpec("test/topic", 1)
+        assert "_encoded" not in repr(spec)
+
+    @pytest.mark.parametrize(("attr", "value"), [("topicfilter", "b"), ("qos", 0)])
+    def test_frozen(self, attr, value):
+        """Test specs can't be changed after their encoding is cached."""
+        spec = SubscriptionSpec("test/topic", 1)
+
+        with pytest.raises(FrozenInstanceError):
+            setattr(spec, attr, value)
+        assert spec.to_bytes() == b"\x00\x0atest/topic\x01"
+
+    def test_slots(self):
+        """Test specs are slotted (no per-instance __dict__)."""
+        spec = SubscriptionSpec("test/topic", 1)
+
+        assert not hasattr(spec, "__dict__")
+        assert spec.to_bytes() == b"\x00\x0atest/topic\x01"
 
 
 # ===========================================================================
@@ -215,9 +279,8 @@ class TestPacketParsers:
     def test_parse_connack(self):
         """Test parsing CONNACK packet."""
         # CONNACK: type 0x20, length 2, session present, return code
-        data = bytearray([0x20, 0x02, 0x00, 0x00])
         output: list[Any] = []
-        consumed = parse(data, output)
+        consumed = parse(_CONNACK_OK, output)
 
         assert consumed == 4
         assert len(output) == 1
@@ -227,9 +290,8 @@ class TestPacketParsers:
     def test_parse_suback(self):
         """Test parsing SUBACK packet."""
         # SUBACK: type 0x90, length, packet_id, return codes
-        data = bytearray([0x90, 0x03, 0x00, 0x01, 0x01])
         output: list[Any] = []
-        consumed = parse(data, output)
+        consumed = parse(_SUBACK, output)
 
         assert consumed == 5
         assert isinstance(output[0], SubackPacket)
@@ -243,7 +305,7 @@ class TestPacketParsers:
         topic_len = len(topic)
         remaining_len = 2 + topic_len + len(payload)
         data = (
-            bytearray([0x30, remaining_len])
+            bytes([0x30, remaining_len])
             + struct.pack("!H", topic_len)
             + topic
             + payload
@@ -252,6 +314,7 @@ class TestPacketParsers:
         output: list[Any] = []
         consumed = parse(data, output)
 
+        assert consumed == len(data)
         assert isinstance(output[0], PublishPacket)
         assert output[0].topic == "test/topic"
         assert output[0].payload == b"hello"
@@ -267,7 +330,7 @@ class TestPacketParsers:
         remaining_len = 2 + topic_len + 2 + len(payload)  # +2 for packet_id
         # QoS 1 is flags 0x02
         data = (
-            bytearray([0x32, remaining_len])
+            bytes([0x32, remaining_len])
             + struct.pack("!H", topic_len)
             + topic
             + struct.pack("!H", packet_id)
@@ -277,48 +340,121 @@ class TestPacketParsers:
         output: list[Any] = []
         consumed = parse(data, output)
 
+        assert consumed == len(data)
         assert isinstance(output[0], PublishPacket)
         assert output[0].qos == 1
         assert output[0].packetid == 42
 
+    def test_parse_publish_invalid_utf8_topic(self):
+        """Test an invalid UTF-8 topic is rejected by the topic decode itself."""
+        data = b"\x30\x05\x00\x01\xffhi"
+
+        with pytest.raises(UnicodeDecodeError):
+            parse(data, [])
+
+    def test_parse_publish_dup_and_retain(self):
+        """Test parsing PUBLISH fixed-header flags as 0/1 integers."""
+        pkt = publish("test/topic", True, 1, True, b"hello", packet_id=7)
+        output: list[Any] = []
+        parse(bytearray(pkt), output)
+
+        assert output[0].dup == 1
+        assert output[0].qos == 1
+        assert output[0].retain == 1
+        assert output[0].packetid == 7
+
     def test_parse_puback(self):
         """Test parsing PUBACK packet."""
         # PUBACK: type 0x40, length 2, packet_id
-        data = bytearray([0x40, 0x02, 0x00, 0x7B])  # packet_id = 123
         output: list[Any] = []
-        consumed = parse(data, output)
+        consumed = parse(_PUBACK_123, output)
 
         assert consumed == 4
         assert isinstance(output[0], PubackPacket)
         assert output[0].packet_id == 123
 
+    def test_parse_packet_ids_big_endian(self):
+        """Test two-byte packet ids above 255 decode big-endian."""
+        data = (
+            b"\x40\x02\x12\x34"  # PUBACK 0x1234
+            b"\x90\x03\xab\xcd\x00"  # SUBACK 0xABCD
+            + publish("t", False, 1, False, b"", packet_id=0x0102)
+        )
+        output: list[Any] = []
+        parse(data, output)
+
+        assert output[0].packet_id == 0x1234
+        assert output[1].packet_id == 0xABCD
+        assert output[2].packetid == 0x0102
+        assert output[2].topic == "t"
+
     def test_parse_pingresp(self):
         """Test parsing PINGRESP packet."""
-        data = bytearray([0xD0, 0x00])
         output: list[Any] = []
-        consumed = parse(data, output)
+        consumed = parse(_PINGRESP, output)
 
         assert consumed == 2
         assert isinstance(output[0], PingrespPacket)
 
     def test_parse_unknown_type(self):
         """Test parsing unknown packet type returns None."""
-        # Use an unhandled type (e.g., 0x70 = type 7)
-        data = bytearray([0x70, 0x00])
         output: list[Any] = []
-        consumed = parse(data, output)
+        consumed = parse(_UNKNOWN_TYPE, output)
 
         assert consumed == 2
         assert len(output) == 0  # Unknown type not added
 
     def test_parse_type_error(self):
-        """Test parse raises TypeError for non-bytearray."""
-        with pytest.raises(TypeError, match="data must be a bytearray"):
-            parse(b"bytes", [])  # type: ignore[arg-type]
+        """Test parse raises TypeError for non-binary input."""
+        with pytest.raises(TypeError, match="data must be bytes"):
+            parse("text", [])  # type: ignore[arg-type]
+
+    def test_parse_accepts_bytes(self):
+        """Test parse accepts immutable bytes."""
+        output: list[Any] = []
+        consumed = parse(_CONNACK_OK, output)
+
+        assert consumed == 4
+        assert isinstance(output[0], ConnackPacket)
+
+    def test_parse_accepts_memoryview(self):
+        """Test parse reads a memoryview window without copying the buffer."""
+        buf = bytearray(b"\x00\x00")
+        buf += publish("test/topic", False, 1, False, b"hello", packet_id=9)
+        buf += _SUBACK + b"\x20"  # SUBACK + partial CONNACK
+        output: list[Any] = []
+        consumed = parse(memoryview(buf)[2:], output)
+
+        assert consumed == len(buf) - 3
+        assert output[0].topic == "test/topic"
+        assert output[0].payload == b"hello"
+        assert isinstance(output[0].payload, bytes)
+        assert output[1].return_codes == [1]
+
+    def test_parsed_packets_slotted(self):
+        """Test parsed packets carry no per-instance __dict__."""
+        output: list[Any] = []
+        parse(_CONNACK_OK + _SUBACK + _PUBACK_123 + _PINGRESP, output)
+        parse(publish("t", False, 0, False, b""), output)
+
+        assert len(output) == 5
+        assert not any(hasattr(pkt, "__dict__") for pkt in output)
+
+    def test_parse_bytearray_released(self):
+        """Test a bytearray buffer can be trimmed in place after parsing."""
+        buf = bytearray(publish("t", False, 0, False, b"hello") + _PINGRESP[:1])
+        output: list[Any] = []
+
+        consumed = parse(buf, output)
+        del buf[:consumed]  # Raises BufferError if a view is still exported
+
+        assert buf == _PINGRESP[:1]
+        assert output[0].payload == b"hello"
+        assert type(output[0].payload) is bytes
 
     def test_parse_incomplete_header(self):
         """Test parse returns early on incomplete header."""
-        data = bytearray([0x20])  # Only first byte, no remaining length
+        data = b"\x20"  # Only first byte, no remaining length
         output: list[Any] = []
         consumed = parse(data, output)
 
@@ -328,7 +464,7 @@ class TestPacketParsers:
     def test_parse_incomplete_packet(self):
         """Test parse returns early on incomplete packet body."""
         # CONNACK header says 2 bytes remaining, but only provide 1
-        data = bytearray([0x20, 0x02, 0x00])  # Missing 1 byte
+        data = b"\x20\x02\x00"  # Missing 1 byte
         output: list[Any] = []
         consumed = parse(data, output)
 
@@ -340,13 +476,58 @@ class TestPacketParsers:
         # Create a packet with remaining length > 127 (requires continuation bit)
         # We'll simulate this with remaining length 184 (0xB8)
         # Encoded as: 0xB8, 0x01 (184 % 128 = 56, with continuation | 0x80 = 0xB8, then 184 // 128 = 1)
-        data = bytearray([0x30, 0xB8, 0x01])  # PUBLISH with length 184
+        data = b"\x30\xb8\x01"  # PUBLISH with length 184
         # But we don't have enough data for remaining 184 bytes
         output: list[Any] = []
         consumed = parse(data, output)
 
         assert consumed == 0  # Not enough data
 
+    def test_parse_truncated_remaining_length(self):
+        """Test parse waits when the length varint itself is cut short."""
+        output: list[Any] = []
+
+        assert parse(b"\x30\xb8", output) == 0
+        assert output == []
+
+    @pytest.mark.parametrize(
+        "header",
+        [b"\x30\xff\xff\xff", b"\x30\xff\xff\xff\xff"],
+        ids=["cut-in-field", "cut-before-fifth"],
+    )
+    def test_parse_truncated_long_remaining_length(self, header):
+        """Test parse waits on a three- or four-byte length field cut short."""
+        assert parse(header, []) == 0
+
+    def test_parse_five_byte_remaining_length(self):
+        """Test a malformed fifth length byte is skipped, not added."""
+        # PINGRESP whose zero length is padded out to five bytes
+        data = b"\xd0\x80\x80\x80\x80\x7f"
+        output: list[Any] = []
+
+        assert parse(data, output) == len(data)
+        assert output == [PingrespPacket()]
+
+    @pytest.mark.parametrize("remaining_length", [2, 127, 128, 16383, 16384])
+    def test_parse_remaining_length_boundaries(self, remaining_length):
+        """Test lengths on either side of each varint byte boundary."""
+        topic_len = remaining_length - 2
+        body = struct.pack("!H", topic_len) + b"t" * topic_len
+        data = b"\x30" + _encode_remaining_length(remaining_length) + body
+        output: list[Any] = []
+
+        assert parse(data, output) == len(data)
+        assert output[0].topic == "t" * topic_len
+
+    @pytest.mark.parametrize("flags", [0x0, 0x1, 0x8, 0x9])
+    def test_parse_dispatch_ignores_flag_nibble(self, flags):
+        """Test QoS 0 PUBLISH dispatches for every DUP/RETAIN combination."""
+        data = bytes([0x30 | flags]) + b"\x03\x00\x01t"
+        output: list[Any] = []
+
+        assert parse(data, output) == len(data)
+        assert output == [PublishPacket(flags >> 3, 0, flags & 0x01, "t", None, b"")]
+
 
 # ===========================================================================
 # parse_one Tests
@@ -358,15 +539,13 @@ class TestParseOne:
 
     def test_parse_one_bytes(self):
         """Test parse_one with bytes input."""
-        data = bytes([0x20, 0x02, 0x00, 0x00])  # CONNACK
-        result = parse_one(data)
+        result = parse_one(_CONNACK_OK)
 
         assert isinstance(result, ConnackPacket)
 
     def test_parse_one_bytearray(self):
         """Test parse_one with bytearray input."""
-        data = bytearray([0xD0, 0x00])  # PINGRESP
-        result = parse_one(data)
+        result = parse_one(bytearray(_PINGRESP))
 
         assert isinstance(result, PingrespPacket)
 
@@ -382,8 +561,6 @@ class TestMqttTopicBuilding:
 
     def test_build_subscription_topics_with_batch(self):
         """Test building subscription topics with /batch included."""
-        from custom_components.mysa.mysa_mqtt import build_subscription_topics
-
         device_ids = ["device1", "device2"]
 
         topics = build_subscription_topics(device_ids, include_batch=True)
@@ -402,8 +579,6 @@ class TestMqttTopicBuilding:
 
     def test_build_subscription_topics_without_batch(self):
         """Test building subscription topics without /batch included."""
-        from custom_components.mysa.mysa_mqtt import build_subscription_topics
-
         device_ids = ["device1", "device2"]
 
         topics = build_subscription_topics(device_ids, include_batch=False)
@@ -420,18 +595,22 @@ class TestMqttTopicBuilding:
         assert "/v1/dev/device2/in" in topic_strings
         assert "/v1/dev/device2/batch" not in topic_strings
 
+    def test_build_subscription_topics_cached_per_device(self):
+        """Test specs are reused across calls (reconnects) for the same device."""
+        first = build_subscription_topics(["40:91:51:E4:0D:E0", "device2"])
+        again = build_subscription_topics(["device2"])
+
+        assert again[0] is first[3]
+        assert build_subscription_topics(["device2"], include_batch=False) == again[:2]
+
     def test_build_subscription_topics_empty(self):
         """Test building subscription topics with empty list."""
-        from custom_components.mysa.mysa_mqtt import build_subscription_topics
-
         topics = build_subscription_topics([])
 
         assert topics == []
 
     def test_build_subscription_topics_normalizes_ids(self):
         """Test that device IDs are normalized (lowercase, no colons)."""
-        from custom_components.mysa.mysa_mqtt import build_subscription_topics
-
         # Device ID with colons and mixed case
         device_ids = ["40:91:51:E4:0D:E0"]
 
@@ -466,10 +645,7 @@ class TestMqttTopicBuilding:
         """Test extracting device ID from topic."""
         topic = "/v1/dev/device1/out"
 
-        parts = topic.split("/")
-        device_id = parts[3]  # /v1/dev/{id}/out
-
-        assert device_id == "device1"
+        assert extract_device_id(topic) == "device1"
 
 
 class TestMqttMessageEnvelope:
@@ -550,9 +726,7 @@ class TestMqttPayloadParsing:
             "cmd": [{"sp": 22.0}, {"br": 80}, {"lk": 1}]
         }
 
-        extracted: dict[str, Any] = {}
-        for item in data["cmd"]:
-            extracted.update(item)
+        extracted = {k: v for item in data["cmd"] for k, v in item.items()}
 
         assert extracted["sp"] == 22.0
         assert extracted["br"] == 80
@@ -562,53 +736,22 @@ class TestMqttPayloadParsing:
 class TestMqttPacketConstants:
     """Test MQTT packet type identification."""
 
-    def test_connect_packet_type(self):
-        """Test CONNECT packet type."""
-        CONNECT = 0x10
-
-        assert CONNECT == 16
-
-    def test_connack_packet_type(self):
-        """Test CONNACK packet type."""
-        CONNACK = 0x20
-
-        assert CONNACK == 32
-
-    def test_publish_packet_type(self):
-        """Test PUBLISH packet type."""
-        PUBLISH = 0x30
-
-        assert PUBLISH == 48
-
-    def test_subscribe_packet_type(self):
-        """Test SUBSCRIBE packet type."""
-        SUBSCRIBE = 0x82
-
-        assert SUBSCRIBE == 130
-
-    def test_suback_packet_type(self):
-        """Test SUBACK packet type."""
-        SUBACK = 0x90
-
-        assert SUBACK == 144
-
-    def test_pingreq_packet_type(self):
-        """Test PINGREQ packet type."""
-        PINGREQ = 0xC0
-
-        assert PINGREQ == 192
-
-    def test_pingresp_packet_type(self):
-        """Test PINGRESP packet type."""
-        PINGRESP = 0xD0
-
-        assert PINGRESP == 208
-
-    def test_disconnect_packet_type(self):
-        """Test DISCONNECT packet type."""
-        DISCONNECT = 0xE0
-
-        assert DISCONNECT == 224
+    @pytest.mark.parametrize(
+        ("pkt_type", "first_byte"),
+        [
+            (MQTT_PACKET_CONNECT, 0x10),
+            (MQTT_PACKET_CONNACK, 0x20),
+            (MQTT_PACKET_PUBLISH, 0x30),
+            (MQTT_PACKET_SUBSCRIBE, 0x82),
+            (MQTT_PACKET_SUBACK, 0x90),
+            (MQTT_PACKET_PINGREQ, 0xC0),
+            (MQTT_PACKET_PINGRESP, 0xD0),
+            (MQTT_PACKET_DISCONNECT, 0xE0),
+        ],
+    )
+    def test_packet_type_nibble(self, pkt_type, first_byte):
+        """Test each packet type occupies the high nibble of the first byte."""
+        assert pkt_type == first_byte >> 4
 
 
 class TestMqttQosLevels:
@@ -652,12 +795,13 @@ class TestMqttConnectionParams:
 
     def test_client_id_format(self):
         """Test client ID format."""
-        import uuid
-
-        client_id = str(uuid.uuid4())
+        packet = mysa_mqtt.create_connect_packet()
+        # Fixed header (2) + variable header (10) + client id length (2)
+        client_id = packet[14:].decode()
 
-        assert len(client_id) == 36
-        assert "-" in client_id
+        assert struct.unpack("!H", packet[12:14])[0] == 32
+        assert len(client_id) == 32
+        assert all(c in "0123456789abcdef" for c in client_id)
 
     def test_keepalive_bounds(self):
         """Test keepalive bounds."""
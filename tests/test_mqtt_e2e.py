@@ -3,6 +3,8 @@
 Tests real-time updates using a mock MQTT broker.
 """
 
+import asyncio
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -119,6 +121,27 @@ async def test_mqtt_broker_basic(mock_mqtt_broker):
     await client2.disconnect()
 
 
+@pytest.mark.mqtt
+@pytest.mark.asyncio
+async def test_mqtt_broker_receive_waits_and_times_out(mock_mqtt_broker):
+    """Test receive blocks until delivery and returns None on timeout."""
+    client = mock_mqtt_broker.create_client("waiter")
+    await client.connect()
+    await client.subscribe("/test/topic")
+
+    assert await client.receive(timeout=0.01) is None
+
+    pending = asyncio.create_task(client.receive(timeout=1.0))
+    await asyncio.sleep(0)  # Let receive start waiting on an empty inbox
+    await mock_mqtt_broker.inject_message(topic="/test/topic", payload={"a": 1})
+
+    msg = await pending
+    assert msg is not None
+    assert msg.payload == b'{"a": 1}'
+
+    await client.disconnect()
+
+
 @pytest.mark.mqtt
 @pytest.mark.asyncio
 async def test_mqtt_wildcard_subscription(mock_mqtt_broker):
@@ -205,10 +228,9 @@ async def test_mqtt_state_update_injection(
     coordinator.async_set_updated_data(api.states)
     await hass.async_block_till_done()
 
-    # Force time forward to clear sticky state
-    import time
-
-    with patch("time.time", return_value=time.time() + 40):
+    # Force the climate entity's clock forward to clear sticky state
+    later = time.time() + 40
+    with patch("custom_components.mysa.climate.time.time", return_value=later):
         # Re-set data to trigger entity update with cleared sticky state
         coordinator.async_set_updated_data(api.states)
         await hass.async_block_till_done()
@@ -1,5 +1,7 @@
 """Tests for the Mysa Extended integration."""
 
+from itertools import product
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -16,8 +18,51 @@ from custom_components.mysa_extended import (
     async_unload_entry,
 )
 
+# Read-only service call and registry entry shared by every test
+_CALL = MagicMock(data={"device_id": "ha_device_id"})
+_DEVICE_ENTRY = MagicMock(
+    identifiers={(MYSA_DOMAIN, "device_123")}, config_entries={"test_entry"}
+)
+
+# (service, API method it awaits, translation key prefix)
+SERVICES = [
+    (async_service_upgrade_lite, "async_upgrade_lite_device", "upgrade"),
+    (async_service_downgrade_lite, "async_downgrade_lite_device", "downgrade"),
+    (async_service_killer_ping, "async_send_killer_ping", "killer_ping"),
+]
+
+# Failure mode -> translation key ({} is the service's key prefix)
+FAILURES = {
+    "no_device": "device_not_found",
+    "no_integration": "mysa_integration_not_found_for_device",
+    "api_not_initialized": "mysa_api_not_initialized",
+    "api_failure": "{}_failed",
+    "generic_exception": "{}_error",
+}
+
+
+async def _fail(*_args: Any, **_kwargs: Any) -> bool:
+    """API call that reports failure."""
+    return False
+
+
+@pytest.fixture(name="patch_device_registry", autouse=True)
+def patch_device_registry_fixture():
+    """Patch the device registry for every test; yields its device lookup mock."""
+    with patch("homeassistant.helpers.device_registry.async_get") as mock_dr_get:
+        lookup = mock_dr_get.return_value.async_get
+        lookup.return_value = _DEVICE_ENTRY
+        yield lookup
+
+
+@pytest.fixture(name="mysa_hass_data")
+def mysa_hass_data_fixture(hass: HomeAssistant):
+    """Install an empty hass.data[MYSA_DOMAIN] and remove it afterwards."""
+    hass.data[MYSA_DOMAIN] = {}
+    yield hass.data[MYSA_DOMAIN]
+    hass.data.pop(MYSA_DOMAIN, None)
+
 
-@pytest.mark.asyncio
 async def test_async_setup(hass: HomeAssistant):
     """Test async_setup registers services."""
     result = await async_setup(hass, {})
@@ -33,7 +78,6 @@ async def test_async_setup(hass: HomeAssistant):
     assert result2 is True
 
 
-@pytest.mark.asyncio
 async def test_async_setup_entry(hass: HomeAssistant):
     """Test async_setup_entry registers services."""
     mock_entry = MagicMock()
@@ -47,7 +91,6 @@ async def test_async_setup_entry(hass: HomeAssistant):
     assert result2 is True
 
 
-@pytest.mark.asyncio
 async def test_async_unload_entry(hass: HomeAssistant):
     """Test async_unload_entry."""
     mock_entry = MagicMock()
@@ -55,520 +98,138 @@ async def test_async_unload_entry(hass: HomeAssistant):
     assert result is True
 
 
-@pytest.mark.asyncio
-async def test_upgrade_lite_device_success(hass: HomeAssistant):
+async def test_upgrade_lite_device_success(
+    hass: HomeAssistant, mysa_hass_data, monkeypatch
+):
     """Test successful upgrade of lite device and option sync."""
-    # Mock API
-    mock_api = MagicMock()
-    mock_api.async_upgrade_lite_device = AsyncMock(return_value=True)
+    mock_api = MagicMock(async_upgrade_lite_device=AsyncMock(return_value=True))
 
-    # Mock Config Entry
-    mock_entry = MagicMock()
-    mock_entry.entry_id = "test_entry"
-    mock_entry.options = {}
-
-    # Setup hass data
-    hass.data[MYSA_DOMAIN] = {"test_entry": {"api": mock_api}}
-
-    # Mock device registry
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"test_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
-
-    with (
-        patch(
-            "homeassistant.helpers.device_registry.async_get",
-            return_value=mock_device_registry,
-        ),
-        patch.object(hass.config_entries, "async_get_entry", return_value=mock_entry),
-        patch.object(hass.config_entries, "async_update_entry") as mock_update,
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        await async_service_upgrade_lite(call, hass)
-
-        # Verify API method was called
-        mock_api.async_upgrade_lite_device.assert_called_once_with("device_123")
-
-        # Verify options were updated
-        mock_update.assert_called_once()
-        args, kwargs = mock_update.call_args
-        assert kwargs["options"]["upgraded_lite_devices"] == ["device_123"]
-
-
-@pytest.mark.asyncio
-@pytest.mark.asyncio
-async def test_downgrade_lite_device_success(hass: HomeAssistant):
-    """Test successful downgrade of device and option sync."""
-    # Mock API
-    mock_api = MagicMock()
-    mock_api.async_downgrade_lite_device = AsyncMock(return_value=True)
+    mock_entry = MagicMock(entry_id="test_entry", options={})
 
-    # Mock Config Entry
-    mock_entry = MagicMock()
-    mock_entry.entry_id = "test_entry"
-    mock_entry.options = {"upgraded_lite_devices": ["device_123"]}
-
-    # Setup hass data
-    hass.data[MYSA_DOMAIN] = {"test_entry": {"api": mock_api}}
-
-    # Mock device registry
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"test_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
-
-    with (
-        patch(
-            "homeassistant.helpers.device_registry.async_get",
-            return_value=mock_device_registry,
-        ),
-        patch.object(hass.config_entries, "async_get_entry", return_value=mock_entry),
-        patch.object(hass.config_entries, "async_update_entry") as mock_update,
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        await async_service_downgrade_lite(call, hass)
-
-        # Verify API method was called
-        mock_api.async_downgrade_lite_device.assert_called_once_with("device_123")
-
-        # Verify options were updated (removed)
-        mock_update.assert_called_once()
-        args, kwargs = mock_update.call_args
-        assert kwargs["options"]["upgraded_lite_devices"] == []
-
-
-@pytest.mark.asyncio
-async def test_upgrade_lite_device_no_device(hass: HomeAssistant):
-    """Test upgrade when device not found."""
-    mock_device_registry = MagicMock()
-    mock_device_registry.async_get.return_value = None
-
-    with patch(
-        "homeassistant.helpers.device_registry.async_get",
-        return_value=mock_device_registry,
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "invalid_device"}
-
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_upgrade_lite(call, hass)
-        assert excinfo.value.translation_key == "device_not_found"
-
-
-@pytest.mark.asyncio
-async def test_upgrade_lite_device_no_mysa_integration(hass: HomeAssistant):
-    """Test upgrade when base mysa integration not found."""
-    # Mock device registry
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"test_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
-
-    # hass.data[MYSA_DOMAIN] is empty
-    hass.data[MYSA_DOMAIN] = {}
+    mysa_hass_data["test_entry"] = {"api": mock_api}
 
-    with patch(
-        "homeassistant.helpers.device_registry.async_get",
-        return_value=mock_device_registry,
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
+    mock_update = MagicMock()
+    monkeypatch.setattr(
+        hass.config_entries, "async_get_entry", lambda _entry_id: mock_entry
+    )
+    monkeypatch.setattr(hass.config_entries, "async_update_entry", mock_update)
 
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_upgrade_lite(call, hass)
-        assert excinfo.value.translation_key == "mysa_integration_not_found_for_device"
+    await async_service_upgrade_lite(_CALL, hass)
 
+    # Verify API method was called
+    mock_api.async_upgrade_lite_device.assert_called_once_with("device_123")
 
-@pytest.mark.asyncio
-async def test_upgrade_lite_device_api_failure(hass: HomeAssistant):
-    """Test upgrade when API returns failure."""
-    mock_api = MagicMock()
-    mock_api.async_upgrade_lite_device = AsyncMock(return_value=False)
+    # Verify options were updated
+    mock_update.assert_called_once()
+    args, kwargs = mock_update.call_args
+    assert kwargs["options"]["upgraded_lite_devices"] == ["device_123"]
 
-    # Mock Config Entry
-    mock_entry = MagicMock()
-    mock_entry.entry_id = "test_entry"
-
-    hass.data[MYSA_DOMAIN] = {"test_entry": {"api": mock_api}}
-
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"test_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
-
-    with (
-        patch(
-            "homeassistant.helpers.device_registry.async_get",
-            return_value=mock_device_registry,
-        ),
-        patch.object(hass.config_entries, "async_get_entry", return_value=mock_entry),
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_upgrade_lite(call, hass)
-        assert excinfo.value.translation_key == "upgrade_failed"
-
-
-@pytest.mark.asyncio
-async def test_service_downgrade_no_device(hass: HomeAssistant):
-    """Test downgrade when device not found."""
-    mock_device_registry = MagicMock()
-    mock_device_registry.async_get.return_value = None
-
-    with patch(
-        "homeassistant.helpers.device_registry.async_get",
-        return_value=mock_device_registry,
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "invalid_device"}
-
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_downgrade_lite(call, hass)
-        assert excinfo.value.translation_key == "device_not_found"
-
-
-@pytest.mark.asyncio
-async def test_service_downgrade_no_mysa_integration(hass: HomeAssistant):
-    """Test downgrade when base mysa integration not found."""
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"test_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
 
-    hass.data[MYSA_DOMAIN] = {}
+async def test_downgrade_lite_device_success(
+    hass: HomeAssistant, mysa_hass_data, monkeypatch
+):
+    """Test successful downgrade of device and option sync."""
+    mock_api = MagicMock(async_downgrade_lite_device=AsyncMock(return_value=True))
 
-    with patch(
-        "homeassistant.helpers.device_registry.async_get",
-        return_value=mock_device_registry,
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
+    mock_entry = MagicMock(
+        entry_id="test_entry", options={"upgraded_lite_devices": ["device_123"]}
+    )
 
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_downgrade_lite(call, hass)
-        assert excinfo.value.translation_key == "mysa_integration_not_found_for_device"
+    mysa_hass_data["test_entry"] = {"api": mock_api}
 
+    mock_update = MagicMock()
+    monkeypatch.setattr(
+        hass.config_entries, "async_get_entry", lambda _entry_id: mock_entry
+    )
+    monkeypatch.setattr(hass.config_entries, "async_update_entry", mock_update)
 
-@pytest.mark.asyncio
-async def test_service_upgrade_integration_not_loaded(hass: HomeAssistant):
-    """Test upgrade when Mysa integration is not loaded."""
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    # Identifiers match but no config entry loaded yet
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"test_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
+    await async_service_downgrade_lite(_CALL, hass)
 
-    # Ensure MYSA_DOMAIN is missing from hass.data
-    if MYSA_DOMAIN in hass.data:
-        hass.data.pop(MYSA_DOMAIN)
-
-    with patch(
-        "homeassistant.helpers.device_registry.async_get",
-        return_value=mock_device_registry,
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_upgrade_lite(call, hass)
-        assert excinfo.value.translation_key == "mysa_integration_not_loaded"
-
-
-@pytest.mark.asyncio
-async def test_service_upgrade_api_not_initialized(hass: HomeAssistant):
-    """Test upgrade when API is not in hass.data."""
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"test_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
-
-    # Entry exists but API is missing
-    hass.data[MYSA_DOMAIN] = {"test_entry": {"loaded": True}}
-    mock_entry = MagicMock(entry_id="test_entry")
-
-    with (
-        patch(
-            "homeassistant.helpers.device_registry.async_get",
-            return_value=mock_device_registry,
-        ),
-        patch.object(hass.config_entries, "async_get_entry", return_value=mock_entry),
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_upgrade_lite(call, hass)
-        assert excinfo.value.translation_key == "mysa_api_not_initialized"
-
-
-@pytest.mark.asyncio
-async def test_service_downgrade_api_not_initialized(hass: HomeAssistant):
-    """Test downgrade when API is not in hass.data."""
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"test_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
-
-    hass.data[MYSA_DOMAIN] = {"test_entry": {"loaded": True}}
-    mock_entry = MagicMock(entry_id="test_entry")
+    # Verify API method was called
+    mock_api.async_downgrade_lite_device.assert_called_once_with("device_123")
 
-    with (
-        patch(
-            "homeassistant.helpers.device_registry.async_get",
-            return_value=mock_device_registry,
-        ),
-        patch.object(hass.config_entries, "async_get_entry", return_value=mock_entry),
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
+    # Verify options were updated (removed)
+    mock_update.assert_called_once()
+    args, kwargs = mock_update.call_args
+    assert kwargs["options"]["upgraded_lite_devices"] == []
 
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_downgrade_lite(call, hass)
-        assert excinfo.value.translation_key == "mysa_api_not_initialized"
 
+async def test_service_upgrade_integration_not_loaded(hass: HomeAssistant):
+    """Test upgrade when Mysa integration is not loaded."""
+    # Ensure MYSA_DOMAIN is missing from hass.data
+    hass.data.pop(MYSA_DOMAIN, None)
 
-@pytest.mark.asyncio
-async def test_downgrade_api_failure(hass: HomeAssistant):
-    """Test downgrade when API returns failure."""
-    mock_api = MagicMock()
-    mock_api.async_downgrade_lite_device = AsyncMock(return_value=False)
+    with pytest.raises(HomeAssistantError) as excinfo:
+        await async_service_upgrade_lite(_CALL, hass)
+    assert excinfo.value.translation_key == "mysa_integration_not_loaded"
 
-    hass.data[MYSA_DOMAIN] = {"test_entry": {"api": mock_api}}
-    mock_entry = MagicMock(entry_id="test_entry")
 
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"test_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
-
-    with (
-        patch(
-            "homeassistant.helpers.device_registry.async_get",
-            return_value=mock_device_registry,
-        ),
-        patch.object(hass.config_entries, "async_get_entry", return_value=mock_entry),
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_downgrade_lite(call, hass)
-        assert excinfo.value.translation_key == "downgrade_failed"
-
-
-@pytest.mark.asyncio
-async def test_upgrade_generic_exception(hass: HomeAssistant):
-    """Test upgrade handles generic exceptions."""
-    with patch(
-        "homeassistant.helpers.device_registry.async_get",
-        side_effect=ValueError("Boom"),
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_upgrade_lite(call, hass)
-        assert excinfo.value.translation_key == "upgrade_error"
-
-
-@pytest.mark.asyncio
-async def test_downgrade_generic_exception(hass: HomeAssistant):
-    """Test downgrade handles generic exceptions."""
-    with patch(
-        "homeassistant.helpers.device_registry.async_get",
-        side_effect=ValueError("Boom"),
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_downgrade_lite(call, hass)
-        assert excinfo.value.translation_key == "downgrade_error"
-
-
-@pytest.mark.asyncio
-async def test_killer_ping_success(hass: HomeAssistant):
+async def test_killer_ping_success(hass: HomeAssistant, mysa_hass_data, monkeypatch):
     """Test successful killer ping."""
-    mock_api = MagicMock()
-    mock_api.async_send_killer_ping = AsyncMock(return_value=True)
+    mock_api = MagicMock(async_send_killer_ping=AsyncMock(return_value=True))
 
-    mock_entry = MagicMock()
-    mock_entry.entry_id = "test_entry"
-
-    hass.data[MYSA_DOMAIN] = {"test_entry": {"api": mock_api}}
-
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"test_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
-
-    with (
-        patch(
-            "homeassistant.helpers.device_registry.async_get",
-            return_value=mock_device_registry,
-        ),
-        patch.object(hass.config_entries, "async_get_entry", return_value=mock_entry),
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        await async_service_killer_ping(call, hass)
-        mock_api.async_send_killer_ping.assert_called_once_with("device_123")
-
-
-@pytest.mark.asyncio
-async def test_killer_ping_device_not_found(hass: HomeAssistant):
-    """Test killer ping with device not found."""
-    mock_device_registry = MagicMock()
-    mock_device_registry.async_get.return_value = None
-
-    with patch(
-        "homeassistant.helpers.device_registry.async_get",
-        return_value=mock_device_registry,
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_killer_ping(call, hass)
-        assert excinfo.value.translation_key == "device_not_found"
-
-
-@pytest.mark.asyncio
-async def test_killer_ping_mysa_not_found(hass: HomeAssistant):
-    """Test killer ping when mysa integration not found."""
-    hass.data[MYSA_DOMAIN] = {}
+    mock_entry = MagicMock(entry_id="test_entry")
 
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"other_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
+    mysa_hass_data["test_entry"] = {"api": mock_api}
 
-    with patch(
-        "homeassistant.helpers.device_registry.async_get",
-        return_value=mock_device_registry,
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
+    monkeypatch.setattr(
+        hass.config_entries, "async_get_entry", lambda _entry_id: mock_entry
+    )
 
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_killer_ping(call, hass)
-        assert excinfo.value.translation_key == "mysa_integration_not_found_for_device"
+    await async_service_killer_ping(_CALL, hass)
+    mock_api.async_send_killer_ping.assert_called_once_with("device_123")
 
 
-@pytest.mark.asyncio
-async def test_killer_ping_api_not_initialized(hass: HomeAssistant):
-    """Test killer ping when API not initialized."""
-    hass.data[MYSA_DOMAIN] = {"test_entry": {"loaded": True}}
-    mock_entry = MagicMock(entry_id="test_entry")
+@pytest.mark.parametrize(
+    ("service", "failure"),
+    product(SERVICES, FAILURES),
+    ids=lambda param: param[-1] if isinstance(param, tuple) else param,
+)
+async def test_service_error_paths(
+    hass: HomeAssistant,
+    patch_device_registry,
+    mysa_hass_data,
+    service,
+    failure,
+    monkeypatch,
+):
+    """Test each service maps each lookup/API failure to its translation key."""
+    service_fn, api_method, key_prefix = service
+    translation_key = FAILURES[failure].format(key_prefix)
+
+    if failure == "no_device":
+        patch_device_registry.return_value = None
+    elif failure == "generic_exception":
+        patch_device_registry.side_effect = ValueError("Boom")
+    elif failure == "api_not_initialized":
+        mysa_hass_data["test_entry"] = {"loaded": True}
+    elif failure == "api_failure":
+        mock_api = MagicMock()
+        setattr(mock_api, api_method, _fail)
+        mysa_hass_data["test_entry"] = {"api": mock_api}
 
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"test_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
-
-    with (
-        patch(
-            "homeassistant.helpers.device_registry.async_get",
-            return_value=mock_device_registry,
-        ),
-        patch.object(hass.config_entries, "async_get_entry", return_value=mock_entry),
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_killer_ping(call, hass)
-        assert excinfo.value.translation_key == "mysa_api_not_initialized"
-
-
-@pytest.mark.asyncio
-async def test_killer_ping_api_failure(hass: HomeAssistant):
-    """Test killer ping when API returns failure."""
-    mock_api = MagicMock()
-    mock_api.async_send_killer_ping = AsyncMock(return_value=False)
-
-    hass.data[MYSA_DOMAIN] = {"test_entry": {"api": mock_api}}
     mock_entry = MagicMock(entry_id="test_entry")
+    monkeypatch.setattr(
+        hass.config_entries, "async_get_entry", lambda _entry_id: mock_entry
+    )
+
+    with pytest.raises(HomeAssistantError) as excinfo:
+        await service_fn(_CALL, hass)
+    assert excinfo.value.translation_key == translation_key
 
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"test_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
-
-    with (
-        patch(
-            "homeassistant.helpers.device_registry.async_get",
-            return_value=mock_device_registry,
-        ),
-        patch.object(hass.config_entries, "async_get_entry", return_value=mock_entry),
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_killer_ping(call, hass)
-        assert excinfo.value.translation_key == "killer_ping_failed"
-
-
-@pytest.mark.asyncio
-async def test_killer_ping_generic_exception(hass: HomeAssistant):
-    """Test killer ping handles generic exceptions."""
-    with patch(
-        "homeassistant.helpers.device_registry.async_get",
-        side_effect=ValueError("Boom"),
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_killer_ping(call, hass)
-        assert excinfo.value.translation_key == "killer_ping_error"
-
-
-@pytest.mark.asyncio
-async def test_upgrade_lite_device_invalid_data(hass: HomeAssistant):
-    """Test upgrade when Mysa data is invalid (not a dict)."""
-    mock_device_registry = MagicMock()
-    mock_device_entry = MagicMock()
-    mock_device_entry.identifiers = {(MYSA_DOMAIN, "device_123")}
-    mock_device_entry.config_entries = {"test_entry"}
-    mock_device_registry.async_get.return_value = mock_device_entry
 
+async def test_upgrade_lite_device_invalid_data(
+    hass: HomeAssistant, mysa_hass_data, monkeypatch
+):
+    """Test upgrade when Mysa data is invalid (not a dict)."""
     # Invalid data (not a dict)
-    hass.data[MYSA_DOMAIN] = {"test_entry": "invalid_string"}
+    mysa_hass_data["test_entry"] = "invalid_string"
     mock_entry = MagicMock(entry_id="test_entry")
 
-    with (
-        patch(
-            "homeassistant.helpers.device_registry.async_get",
-            return_value=mock_device_registry,
-        ),
-        patch.object(hass.config_entries, "async_get_entry", return_value=mock_entry),
-    ):
-        call = MagicMock()
-        call.data = {"device_id": "ha_device_id"}
-
-        with pytest.raises(HomeAssistantError) as excinfo:
-            await async_service_upgrade_lite(call, hass)
-        assert excinfo.value.translation_key == "mysa_data_invalid"
+    monkeypatch.setattr(
+        hass.config_entries, "async_get_entry", lambda _entry_id: mock_entry
+    )
+
+    with pytest.raises(HomeAssistantError) as excinfo:
+        await async_service_upgrade_lite(_CALL, hass)
+    assert excinfo.value.translation_key == "mysa_data_invalid"
@@ -10,8 +10,7 @@ from custom_components.mysa_extended import config_flow
 async def test_options_flow(hass):
     """Test options flow."""
     # Test getting options flow
-    entry = MagicMock()
-    entry.options = {}
+    entry = MagicMock(options={})
 
     # Directly test the static method to ensure coverage of the @callback
     flow = config_flow.ConfigFlow.async_get_options_flow(entry)
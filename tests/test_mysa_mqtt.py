@@ -1,43 +1,153 @@
-from unittest.mock import AsyncMock, patch
+import importlib
+import json
+import sys
+from unittest.mock import AsyncMock, patch, sentinel
 
 import pytest
 
+import custom_components.mysa
 from custom_components.mysa import mqtt, mysa_mqtt
 
+_CONNACK_OK = b"\x20\x02\x00\x00"  # Type 2, length 2, flags 0, code 0
+_PINGRESP = b"\xd0\x00"
+_SUBACK_HEADER_ONLY = b"\x90"  # SUBACK first byte with no length yet
+
+# Parsed handshake responses: CONNACK accepted, SUBACK for packet id 1
+_CONNACK_THEN_SUBACK = (mqtt.ConnackPacket(0, 0), mqtt.SubackPacket(1, [0]))
+
+
+# Only the websocket methods the code under test touches
+_WS_SPEC = ["send", "recv", "close"]
+
+
+def _stage_packets(mock_ws, mock_parse, pairs):
+    """Queue (raw frame, parsed packet) pairs for recv() and the patched parser."""
+    mock_ws.recv.side_effect = [frame for frame, _ in pairs]
+    mock_parse.side_effect = [packet for _, packet in pairs]
+
 
 @pytest.fixture
 def mock_ws():
-    ws = AsyncMock()
+    ws = AsyncMock(spec=_WS_SPEC)
     ws.send = AsyncMock()
     ws.recv = AsyncMock()
     ws.close = AsyncMock()
     return ws
 
 
+@pytest.fixture
+def disconnected_conn():
+    """MqttConnection that has not been entered (no websocket)."""
+    return mysa_mqtt.MqttConnection("url", [])
+
+
+@pytest.fixture
+def connected_conn(mock_ws):
+    """MqttConnection wired to the mock websocket as if already entered."""
+    conn = mysa_mqtt.MqttConnection("url", [])
+    conn._ws = mock_ws
+    conn._connected = True
+    return conn
+
+
 def test_parse_mqtt_packet_bytes():
-    """Test parsing bytes converts to bytearray."""
-    # Create valid CONNACK (type 2, length 2, flags 0, code 0)
-    data = b"\x20\x02\x00\x00"
-    pkt = mysa_mqtt.parse_mqtt_packet(data)
+    """Test parsing a bytes frame."""
+    pkt = mysa_mqtt.parse_mqtt_packet(_CONNACK_OK)
     assert isinstance(pkt, mqtt.ConnackPacket)
 
 
+def test_parse_mqtt_packets_multiple():
+    """Test parsing every packet carried by one frame."""
+    data = _CONNACK_OK + _PINGRESP + _SUBACK_HEADER_ONLY  # Trailing partial packet
+    pkts = mysa_mqtt.parse_mqtt_packets(data)
+    assert [type(p) for p in pkts] == [mqtt.ConnackPacket, mqtt.PingrespPacket]
+
+
+@pytest.mark.parametrize(
+    ("device_id", "expected"),
+    [
+        ("40:91:51:E4:0D:E0", "409151e40de0"),
+        ("409151e40de0", "409151e40de0"),
+        ("Device-1", "device-1"),
+    ],
+)
+def test_normalize_device_id(device_id, expected):
+    """Test colons are stripped and the ID lowercased like replace().lower()."""
+    assert mysa_mqtt.normalize_device_id(device_id) == expected
+    assert expected == device_id.replace(":", "").lower()
+
+
+@pytest.mark.parametrize(
+    ("topic", "expected"),
+    [
+        ("/v1/dev/409151e40de0/out", "409151e40de0"),
+        ("/v1/dev/409151e40de0/batch", "409151e40de0"),
+        ("/v1/dev/409151e40de0", "409151e40de0"),
+        ("/v1/dev//out", None),
+        ("/v1/dev", None),
+        ("", None),
+    ],
+)
+def test_extract_device_id(topic, expected):
+    """Test the device ID segment is taken from the fourth path element."""
+    assert mysa_mqtt.extract_device_id(topic) == expected
+
+
+def test_decode_payload():
+    """Test decoding a JSON payload."""
+    payload = mysa_mqtt.decode_payload(b'{"msg":44,"body":{"cmd":[{"sp":21.0}]}}')
+    assert payload == {"msg": 44, "body": {"cmd": [{"sp": 21.0}]}}
+
+
+def test_decode_payload_control_characters():
+    """Test payloads with raw control characters fall back to the lenient decoder."""
+    payload = mysa_mqtt.decode_payload(b'{"Message":"line1\nline2"}')
+    assert payload == {"Message": "line1\nline2"}
+
+
+def test_decode_payload_invalid():
+    """Test invalid payloads raise a JSON decode error."""
+    with pytest.raises(json.JSONDecodeError):
+        mysa_mqtt.decode_payload(b"{invalid json")
+
+
+def test_decode_payload_without_orjson():
+    """Test decoding with the stdlib decoder only."""
+    with patch.object(mysa_mqtt, "_orjson_loads", None):
+        assert mysa_mqtt.decode_payload(b'{"sp":21.0}') == {"sp": 21.0}
+
+
+def test_orjson_import_fallback():
+    """Test the module imports when orjson is not installed."""
+    with (
+        patch.dict(sys.modules, {"orjson": None}),
+        patch.object(custom_components.mysa, "mysa_mqtt", mysa_mqtt),
+    ):
+        del sys.modules["custom_components.mysa.mysa_mqtt"]
+        module = importlib.import_module("custom_components.mysa.mysa_mqtt")
+
+        assert module._orjson_loads is None
+        assert module.decode_payload(b'{"sp":21.0}') == {"sp": 21.0}
+
+
 @patch("custom_components.mysa.mysa_mqtt.websockets.connect", new_callable=AsyncMock)
-@pytest.mark.asyncio
 async def test_connect_websocket_fallback(mock_connect):
     """Test websocket connect fallback for older versions."""
     # First call raises TypeError, second succeeds
     mock_connect.side_effect = [
         TypeError("unexpected keyword argument 'additional_headers'"),
-        AsyncMock(),
+        sentinel.websocket,
     ]
 
-    await mysa_mqtt.connect_websocket("wss://example.com")
+    result = await mysa_mqtt.connect_websocket("wss://example.com")
+    assert result is sentinel.websocket
 
     assert mock_connect.call_count == 2
-    # Verify second call used extra_headers
-    kwargs = mock_connect.call_args_list[1][1]
-    assert "extra_headers" in kwargs
+    # First attempt uses the current keyword, the retry the legacy one
+    first, second = (c.kwargs for c in mock_connect.call_args_list)
+    assert "additional_headers" in first
+    assert "extra_headers" in second
+    assert second["extra_headers"] == first["additional_headers"]
 
 
 def test_create_subscribe_packet():
@@ -48,160 +158,113 @@ def test_create_subscribe_packet():
     assert pkt[0] >> 4 == 8
 
 
-@pytest.mark.asyncio
-async def test_mqtt_connection_enter_bad_connack(mock_ws):
+@patch("custom_components.mysa.mysa_mqtt.parse_mqtt_packet", return_value="NotConnack")
+@patch("custom_components.mysa.mysa_mqtt.connect_websocket", new_callable=AsyncMock)
+async def test_mqtt_connection_enter_bad_connack(mock_connect, mock_parse, mock_ws):
     """Test connection checks for valid CONNACK."""
-    with (
-        patch(
-            "custom_components.mysa.mysa_mqtt.connect_websocket", return_value=mock_ws
-        ),
-        patch(
-            "custom_components.mysa.mysa_mqtt.parse_mqtt_packet",
-            return_value="NotConnack",
-        ),
-    ):
-        conn = mysa_mqtt.MqttConnection("url", [])
+    mock_connect.return_value = mock_ws
+    conn = mysa_mqtt.MqttConnection("url", [])
 
-        with pytest.raises(RuntimeError, match="Expected CONNACK"):
-            await conn.__aenter__()
+    with pytest.raises(RuntimeError, match="Expected CONNACK"):
+        await conn.__aenter__()
 
-        mock_ws.close.assert_called()
+    mock_ws.close.assert_called()
 
 
-@pytest.mark.asyncio
-async def test_mqtt_connection_enter_bad_suback(mock_ws):
+@patch("custom_components.mysa.mysa_mqtt.parse_mqtt_packet")
+@patch("custom_components.mysa.mysa_mqtt.connect_websocket", new_callable=AsyncMock)
+async def test_mqtt_connection_enter_bad_suback(mock_connect, mock_parse, mock_ws):
     """Test connection checks for valid SUBACK."""
+    mock_connect.return_value = mock_ws
     # First valid CONNACK, then Invalid SUBACK
-    mock_ws.recv.side_effect = ["connack_bytes", "bad_suback_bytes"]
-
-    with (
-        patch(
-            "custom_components.mysa.mysa_mqtt.connect_websocket", return_value=mock_ws
-        ),
-        patch("custom_components.mysa.mysa_mqtt.parse_mqtt_packet") as mock_parse,
-    ):
-        mock_parse.side_effect = [mqtt.ConnackPacket(0, 0), "NotSuback"]
-
-        conn = mysa_mqtt.MqttConnection("url", ["dev1"])
-
-        with pytest.raises(RuntimeError, match="Expected SUBACK"):
-            await conn.__aenter__()
+    _stage_packets(
+        mock_ws,
+        mock_parse,
+        [
+            ("connack_bytes", mqtt.ConnackPacket(0, 0)),
+            ("bad_suback_bytes", "NotSuback"),
+        ],
+    )
+
+    conn = mysa_mqtt.MqttConnection("url", ["dev1"])
+
+    with pytest.raises(RuntimeError, match="Expected SUBACK"):
+        await conn.__aenter__()
 
-        mock_ws.close.assert_called()
+    mock_ws.close.assert_called()
 
 
-@pytest.mark.asyncio
-async def test_mqtt_connection_exit_exception(mock_ws):
+async def test_mqtt_connection_exit_exception(connected_conn, mock_ws):
     """Test exit suppresses disconnect exception."""
     mock_ws.send.side_effect = Exception("Send failed")
 
-    conn = mysa_mqtt.MqttConnection("url", [])
-    conn._ws = mock_ws
-    conn._connected = True
-
     # Should not raise
-    await conn.__aexit__(None, None, None)
+    await connected_conn.__aexit__(None, None, None)
 
     mock_ws.close.assert_called()  # Should still try to close (now fixed in impl)
-    assert conn._ws is None
+    assert connected_conn._ws is None
 
 
-@pytest.mark.asyncio
-async def test_mqtt_connection_receive_timeout(mock_ws):
+async def test_mqtt_connection_receive_timeout(connected_conn):
     """Test receive timeout returns None."""
-    conn = mysa_mqtt.MqttConnection("url", [])
-    conn._ws = mock_ws
 
-    # Mock wait_for to timeout
     # Mock wait_for to timeout and cleanup the coroutine
     async def mock_wait_for_side_effect(coro, timeout):
         coro.close()
         raise TimeoutError()
 
     with patch("asyncio.wait_for", side_effect=mock_wait_for_side_effect):
-        pkt = await conn.receive(timeout=1.0)
+        pkt = await connected_conn.receive(timeout=1.0)
         assert pkt is None
 
 
-@pytest.mark.asyncio
-async def test_mqtt_connection_send_not_connected():
-    """Test send raises if not connected."""
-    conn = mysa_mqtt.MqttConnection("url", [])
-    conn._ws = None
-
-    with pytest.raises(RuntimeError, match="Not connected"):
-        await conn.send(b"data")
-
-
-@pytest.mark.asyncio
-async def test_mqtt_connection_ping_not_connected():
-    """Test ping raises if not connected."""
-    conn = mysa_mqtt.MqttConnection("url", [])
-    conn._ws = None
-
+@pytest.mark.parametrize(
+    ("method", "args"), [("send", (b"data",)), ("send_ping", ()), ("receive", ())]
+)
+async def test_mqtt_connection_not_connected(disconnected_conn, method, args):
+    """Test send, ping and receive raise if not connected."""
     with pytest.raises(RuntimeError, match="Not connected"):
-        await conn.send_ping()
+        await getattr(disconnected_conn, method)(*args)
 
 
-@pytest.mark.asyncio
-async def test_mqtt_connection_success_flow(mock_ws):
+@patch("custom_components.mysa.mysa_mqtt.parse_mqtt_packet")
+@patch("custom_components.mysa.mysa_mqtt.connect_websocket", new_callable=AsyncMock)
+async def test_mqtt_connection_success_flow(mock_connect, mock_parse, mock_ws):
     """Test full success flow for MqttConnection coverage."""
-    mock_ws.recv.side_effect = ["connack", "suback", "message"]
-
-    with (
-        patch(
-            "custom_components.mysa.mysa_mqtt.connect_websocket", return_value=mock_ws
-        ),
-        patch("custom_components.mysa.mysa_mqtt.parse_mqtt_packet") as mock_parse,
-    ):
-        mock_parse.side_effect = [
-            mqtt.ConnackPacket(0, 0),
-            mqtt.SubackPacket(1, [0]),
-            mqtt.PublishPacket(0, 0, 0, "topic", 0, b"payload"),
-        ]
-
-        conn = mysa_mqtt.MqttConnection("url", ["dev1"])
-
-        # Enter
-        await conn.__aenter__()
-        assert conn.connected
-        assert conn.websocket == mock_ws
-
-        # Receive
-        pkt = await conn.receive()
-        assert isinstance(pkt, mqtt.PublishPacket)
-
-        # Send
-        await conn.send(b"data")
-        mock_ws.send.assert_called()
-
-        # Ping
-        await conn.send_ping()
-
-        # Exit
-        await conn.__aexit__(None, None, None)
-        assert conn._ws is None
-
-
-@pytest.mark.asyncio
-async def test_mqtt_connection_receive_not_connected():
-    """Test receive raises if not connected."""
-    conn = mysa_mqtt.MqttConnection("url", [])
-    conn._ws = None
-
-    with pytest.raises(RuntimeError, match="Not connected"):
-        await conn.receive()
+    mock_connect.return_value = mock_ws
+    _stage_packets(
+        mock_ws,
+        mock_parse,
+        [
+            *zip(("connack", "suback"), _CONNACK_THEN_SUBACK),
+            ("message", mqtt.PublishPacket(0, 0, 0, "topic", 0, b"payload")),
+        ],
+    )
+
+    conn = mysa_mqtt.MqttConnection("url", ["dev1"])
+
+    # Enter
+    await conn.__aenter__()
+    assert conn.connected
+    assert conn.websocket == mock_ws
+
+    # Receive
+    pkt = await conn.receive()
+    assert isinstance(pkt, mqtt.PublishPacket)
+
+    # Send
+    await conn.send(b"data")
+    mock_ws.send.assert_called()
+
+    # Ping
+    await conn.send_ping()
+
+    # Exit
+    await conn.__aexit__(None, None, None)
+    assert conn._ws is None
 
 
 def test_legacy_parse_alias():
     """Test legacy parse_mqtt_packet alias."""
-    from custom_components.mysa.mqtt import parse_mqtt_packet
-
-    # MysaPacketType is not exported, we check type instance or just not None
-    data = b"\x20\x02\x00\x00"  # CONNACK
-    pkt = parse_mqtt_packet(data)
-    assert pkt is not None
-    # Check it is ConnackPacket
-    from custom_components.mysa.mqtt import ConnackPacket
-
-    assert isinstance(pkt, ConnackPacket)
+    pkt = mqtt.parse_mqtt_packet(_CONNACK_OK)
+    assert isinstance(pkt, mqtt.ConnackPacket)
@@ -1,301 +1,99 @@
 """Tests for Number entities."""
 
-from typing import Any
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from homeassistant.components.number import NumberMode, async_set_value
+from homeassistant.const import PERCENTAGE
+from homeassistant.exceptions import ServiceValidationError
+
+from custom_components.mysa.number import (
+    MysaMaxBrightnessNumber,
+    MysaMinBrightnessNumber,
+    MysaNumber,
+)
 
 
 class TestMysaBrightnessNumber:
     """Test brightness number entity."""
 
-    def test_brightness_min_value(self):
-        """Test brightness minimum value."""
-        min_brightness = 0
-
-        assert min_brightness == 0
-
-    def test_brightness_max_value(self):
-        """Test brightness maximum value."""
-        max_brightness = 100
-
-        assert max_brightness == 100
-
-    def test_brightness_step(self):
-        """Test brightness step increment."""
-        step = 1
-
-        assert step == 1
-
-    def test_brightness_unit(self):
-        """Test brightness unit is percentage."""
-        from homeassistant.const import PERCENTAGE
-
-        unit = PERCENTAGE
-
-        assert unit == "%"
-
-    def test_brightness_icon(self):
-        """Test brightness number icon."""
-        icon = "mdi:brightness-6"
-
-        assert icon.startswith("mdi:")
-
-    def test_brightness_unique_id_format(self):
-        """Test brightness unique ID format."""
-        device_id = "device1"
-
-        unique_id = f"{device_id}_brightness"
-
-        assert unique_id == "device1_brightness"
+    @pytest.mark.parametrize(
+        "entity_cls", [MysaMinBrightnessNumber, MysaMaxBrightnessNumber]
+    )
+    @pytest.mark.parametrize(
+        ("attr", "expected"),
+        [
+            ("native_min_value", 0),
+            ("native_max_value", 100),
+            ("native_step", 1),
+            ("native_unit_of_measurement", PERCENTAGE),
+            ("mode", NumberMode.SLIDER),
+        ],
+        ids=["min", "max", "step", "unit", "mode"],
+    )
+    def test_brightness_slider(self, entity_cls, attr, expected):
+        """Test brightness entities are 0-100 % sliders in steps of 1."""
+        entity = entity_cls(MagicMock(), "device1", {}, MagicMock(), MagicMock())
+        assert getattr(entity, attr) == expected
+
+    @pytest.mark.parametrize(
+        ("entity_cls", "unique_id"),
+        [
+            (MysaMinBrightnessNumber, "device1_minbrightness"),
+            (MysaMaxBrightnessNumber, "device1_maxbrightness"),
+        ],
+    )
+    def test_brightness_unique_id(self, entity_cls, unique_id):
+        """Test brightness unique IDs are derived from the device ID."""
+        entity = entity_cls(MagicMock(), "device1", {}, MagicMock(), MagicMock())
+        assert entity.unique_id == unique_id
 
 
 class TestBrightnessState:
     """Test brightness state reading."""
 
-    def test_brightness_from_mqtt_simple(self):
-        """Test reading brightness from simple MQTT value."""
-        state = {"Brightness": 75}
-
-        brightness = state.get("Brightness")
-
-        assert brightness == 75
-
-    def test_brightness_from_mqtt_nested(self):
-        """Test reading brightness from nested MQTT value."""
-        state = {"Brightness": {"v": 75, "t": 1704067200}}
-
-        val = state.get("Brightness")
-        extracted = None
-        if isinstance(val, dict):
-            extracted = val.get("v")
-
-        assert extracted == 75
-
-    def test_brightness_short_key(self):
-        """Test reading brightness from short MQTT key."""
-        state = {"br": 80}
-
-        brightness = state.get("br")
-
-        assert brightness == 80
-
-    def test_brightness_fallback_keys(self):
-        """Test falling back through multiple brightness keys."""
-        state = {"br": 75}
-        keys = ["Brightness", "br"]
-
-        val = None
-        for key in keys:
-            val = state.get(key)
-            if val is not None:
-                break
-
-        assert val == 75
+    @pytest.mark.parametrize(
+        "state",
+        [
+            {"mnbr": 75},
+            {"MinBrightness": 75},
+            {"MinBrightness": {"v": 75, "t": 1704067200}},
+            {"MinBrightness": {"Id": 75}},
+            {"mnbr": None, "MinBrightness": 75},
+        ],
+        ids=["short_key", "long_key", "nested_v", "nested_id", "fallback"],
+    )
+    def test_brightness_from_mqtt(self, state):
+        """Test min brightness is read from any of its MQTT key shapes."""
+        coordinator = MagicMock(data={"device1": state})
+        entity = MysaMinBrightnessNumber(
+            coordinator, "device1", {}, MagicMock(), MagicMock()
+        )
+        assert entity.native_value == 75.0
 
 
 class TestBrightnessCommands:
     """Test brightness command building."""
 
-    def test_brightness_command_structure(self):
-        """Test brightness command structure."""
-        device_id = "device1"
-        brightness = 80
-
-        command: dict[str, Any] = {
-            "did": device_id,
-            "cmd": [{"br": brightness}],
-        }
-
-        assert command["did"] == device_id
-        assert command["cmd"][0]["br"] == 80
-
-    def test_brightness_clamp_min(self):
-        """Test brightness is clamped to minimum."""
-        value = -10
-        min_val = 0
-        max_val = 100
-
-        clamped = max(min_val, min(max_val, value))
-
-        assert clamped == 0
-
-    def test_brightness_clamp_max(self):
-        """Test brightness is clamped to maximum."""
-        value = 150
-        min_val = 0
-        max_val = 100
-
-        clamped = max(min_val, min(max_val, value))
-
-        assert clamped == 100
-
-
-class TestMysaMaxCurrentNumber:
-    """Test estimated maximum current number entity."""
-
-    def test_max_current_min_value(self):
-        """Test max current minimum value."""
-        min_current = 0
-
-        assert min_current == 0
-
-    def test_max_current_max_value(self):
-        """Test max current maximum value."""
-        max_current = 30
-
-        assert max_current == 30
-
-    def test_max_current_step(self):
-        """Test max current step increment."""
-        step = 0.5
-
-        assert step == 0.5
-
-    def test_max_current_unit(self):
-        """Test max current unit is Amps."""
-        from homeassistant.const import UnitOfElectricCurrent
-
-        unit = UnitOfElectricCurrent.AMPERE
-
-        assert unit == "A"
-
-    def test_max_current_icon(self):
-        """Test max current number icon."""
-        icon = "mdi:current-ac"
-
-        assert icon == "mdi:current-ac"
-
-    def test_max_current_unique_id_format(self):
-        """Test max current unique ID format."""
-        device_id = "device1"
-
-        unique_id = f"{device_id}_max_current"
-
-        assert unique_id == "device1_max_current"
-
-
-class TestMaxCurrentPowerCalculation:
-    """Test power calculation using max current."""
-
-    def test_power_calculation_full_duty(self):
-        """Test power calculation at 100% duty cycle."""
-        max_current = 15.0  # Amps
-        duty_cycle = 1.0  # 100%
-        voltage = 240  # Volts
-
-        power = max_current * duty_cycle * voltage
-
-        assert power == 3600.0  # 3.6kW
-
-    def test_power_calculation_half_duty(self):
-        """Test power calculation at 50% duty cycle."""
-        max_current = 15.0
-        duty_cycle = 0.5
-        voltage = 240
-
-        power = max_current * duty_cycle * voltage
-
-        assert power == 1800.0  # 1.8kW
-
-    def test_simulated_current_calculation(self):
-        """Test simulated current calculation for Lite devices."""
-        max_current = 20.0
-        duty_cycle = 0.75
-
-        simulated_current = max_current * duty_cycle
-
-        assert simulated_current == 15.0
-
-    def test_common_circuit_breaker_values(self):
-        """Test common circuit breaker values are within range."""
-        min_current = 0
-        max_current = 30
-
-        # Common residential circuit breakers
-        common_values = [15, 20, 25, 30]
-
-        for value in common_values:
-            assert min_current <= value <= max_current
-
-
-class TestNumberPendingState:
-    """Test pending state mechanism for number entities."""
-
-    def test_pending_value_initial(self):
-        """Test pending value is initially None."""
-        pending_value = None
-
-        assert pending_value is None
-
-    def test_pending_value_set_on_command(self):
-        """Test pending value is set when user changes value."""
-        pending_value = None
-
-        # User sets brightness to 80
-        pending_value = 80
-
-        assert pending_value == 80
-
-    def test_pending_value_returned_when_set(self):
-        """Test pending value takes priority over coordinator."""
-        pending_value = 80
-        coordinator_value = 50
-
-        if pending_value is not None:
-            result = pending_value
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [(-10, None), (0, 0), (50, 50), (100, 100), (150, None)],
+    )
+    async def test_brightness_range(self, value, expected):
+        """Test the number service forwards in-range values and rejects the rest."""
+        api = MagicMock(set_min_brightness=AsyncMock())
+        entity = MysaMinBrightnessNumber(MagicMock(), "device1", {}, api, MagicMock())
+        entity.entity_id = "number.device1_min_brightness"
+        entity.async_write_ha_state = MagicMock()
+        call = MagicMock(data={"value": value})
+
+        if expected is None:
+            with pytest.raises(ServiceValidationError):
+                await async_set_value(entity, call)
+            api.set_min_brightness.assert_not_called()
         else:
-            result = coordinator_value
-
-        assert result == 80
-
-    def test_pending_value_cleared_on_confirm(self):
-        """Test pending value is cleared when MQTT confirms."""
-        pending_value: int | None = 80
-
-        # MQTT confirms with new value
-        if True:  # Got confirmed value
-            pending_value = None
-
-        assert pending_value is None
-
-
-class TestNumberEntitySetup:
-    """Test number entity setup logic."""
-
-    def test_brightness_heater_only(self):
-        """Test brightness is only for heater devices."""
-        is_ac = True
-
-        should_create = not is_ac
-
-        assert should_create is False
-
-    def test_brightness_created_for_heaters(self):
-        """Test brightness is created for heater devices."""
-        is_ac = False
-
-        should_create = not is_ac
-
-        assert should_create is True
-
-    def test_max_current_for_lite_only(self):
-        """Test max current is only for Lite devices."""
-        device_type = 5  # BB-V2-L (Lite)
-        lite_types = [5]
-
-        is_lite = device_type in lite_types
-
-        assert is_lite is True
-
-    def test_max_current_not_for_full(self):
-        """Test max current is NOT for Full devices."""
-        device_type = 4  # BB-V2 (Full)
-        lite_types = [5]
-
-        is_lite = device_type in lite_types
-
-        assert is_lite is False
+            await async_set_value(entity, call)
+            api.set_min_brightness.assert_awaited_once_with("device1", expected)
 
 
 # ===========================================================================
@@ -306,8 +104,6 @@ class TestNumberEntitySetup:
 @pytest.mark.asyncio
 async def test_number_value_error(hass):
     """Test number native_value handles invalid types."""
-    from custom_components.mysa.number import MysaMinBrightnessNumber
-
     mock_coordinator = MagicMock()
     # MinBrightness keys: ["MinBrightness", "mnbr"]
     mock_coordinator.data = {"device1": {"MinBrightness": "invalid_float"}}
@@ -328,8 +124,6 @@ class TestNumberCoverageGaps:
 
     def test_number_coverage(self, mock_coordinator, mock_config_entry):
         """Exercise number.py missing lines."""
-        from custom_components.mysa.number import MysaNumber
-
         entity = MysaNumber(
             mock_coordinator, "dev1", {}, MagicMock(), mock_config_entry, "key", "key"
         )
@@ -1,7 +1,10 @@
 """Tests for sticky optimistic UI updates."""
 
 import time
-from unittest.mock import AsyncMock, MagicMock, patch
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from homeassistant.components.climate import HVACAction, HVACMode
@@ -15,15 +18,13 @@ from custom_components.mysa.switch import MysaLockSwitch
 
 @pytest.fixture
 def mock_coordinator():
-    """Mock decorator."""
-    coordinator = MagicMock()
-    coordinator.data = {}
-    return coordinator
+    """Coordinator stub; entities here only ever read .data."""
+    return SimpleNamespace(data={})
 
 
-@pytest.fixture
-def mock_api():
-    """Mock API."""
+@pytest.fixture(scope="module")
+def _api_template():
+    """Mock API graph, built once for this module."""
     api = MagicMock()
     api.set_lock = AsyncMock()
     api.set_target_temperature = AsyncMock()
@@ -33,25 +34,72 @@ def mock_api():
     return api
 
 
+@pytest.fixture
+def mock_api(_api_template):
+    """Mock API shared across tests; call history and side effects reset each time."""
+    _api_template.reset_mock(return_value=True, side_effect=True)
+    return _api_template
+
+
+@dataclass(frozen=True, slots=True)
+class FakeEntry:
+    """Config entry stand-in; entities here only read entry_id and options."""
+
+    entry_id: str = "test_entry"
+    options: dict[str, Any] = field(default_factory=dict)
+
+
 @pytest.fixture
 def mock_entry():
-    """Mock ConfigEntry."""
-    entry = MagicMock(entry_id="test_entry")
-    entry.options = {}
-    return entry
+    """Fake ConfigEntry."""
+    return FakeEntry()
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    """Pin time.time(); advance it with frozen_clock["now"] += seconds."""
+    clock = {"now": 1_700_000_000.0}
+    monkeypatch.setattr("time.time", lambda: clock["now"])
+    return clock
+
+
+@pytest.fixture
+def device_state(mock_coordinator):
+    """Set the coordinator's "device1" state from keyword arguments."""
+
+    def _set(**state):
+        mock_coordinator.data = {"device1": state}
+        return state
+
+    return _set
+
+
+@pytest.fixture
+def make_entity(mock_coordinator, mock_api, mock_entry):
+    """Build an entity for "device1" wired to the shared mocks.
+
+    Entities hold per-test pending state, so each call builds a fresh one;
+    only the construction boilerplate is shared.
+    """
+
+    def _make(entity_cls):
+        entity = entity_cls(mock_coordinator, "device1", {}, mock_api, mock_entry)
+        entity.async_write_ha_state = MagicMock()
+        return entity
+
+    return _make
 
 
 class TestOptimisticSwitch:
     """Test switch optimistic updates."""
 
     @pytest.mark.asyncio
-    async def test_sticky_behavior(self, mock_coordinator, mock_api, mock_entry):
+    async def test_sticky_behavior(self, device_state, make_entity):
         """Test sticky state persistence, expiration, and convergence."""
-        entity = MysaLockSwitch(mock_coordinator, "device1", {}, mock_api, mock_entry)
-        entity.async_write_ha_state = MagicMock()
+        entity = make_entity(MysaLockSwitch)
 
         # 1. Initial State (Cloud = False)
-        mock_coordinator.data = {"device1": {"Lock": {"v": False}}}
+        device_state(Lock={"v": False})
         assert entity.is_on is False
 
         # 2. Turn On (Optimistic)
@@ -64,7 +112,7 @@ class TestOptimisticSwitch:
         assert entity.is_on is True
 
         # 4. Convergence (Cloud becomes True)
-        mock_coordinator.data = {"device1": {"Lock": {"v": True}}}
+        device_state(Lock={"v": True})
         assert entity.is_on is True
         # Logic should clear pending state if it matches
         # Note: In current implementation, _pending_state clears on access if matches
@@ -72,35 +120,33 @@ class TestOptimisticSwitch:
         assert entity._pending_state is None
 
     @pytest.mark.asyncio
-    async def test_expiration(self, mock_coordinator, mock_api, mock_entry):
+    async def test_expiration(self, device_state, make_entity, frozen_clock):
         """Test sticky state expiration."""
-        entity = MysaLockSwitch(mock_coordinator, "device1", {}, mock_api, mock_entry)
-        entity.async_write_ha_state = MagicMock()
+        entity = make_entity(MysaLockSwitch)
 
         # Cloud = False
-        mock_coordinator.data = {"device1": {"Lock": {"v": False}}}
+        device_state(Lock={"v": False})
 
         # Turn On
         await entity.async_turn_on()
         assert entity.is_on is True
 
         # Fast forward time > 30s
-        with patch("time.time", return_value=time.time() + 31):
-            # Should revert to Cloud (False)
-            assert entity.is_on is False
+        frozen_clock["now"] += 31
+        # Should revert to Cloud (False)
+        assert entity.is_on is False
 
 
 class TestOptimisticClimate:
     """Test climate optimistic updates."""
 
     @pytest.mark.asyncio
-    async def test_sticky_temperature(self, mock_coordinator, mock_api, mock_entry):
+    async def test_sticky_temperature(self, device_state, mock_api, make_entity):
         """Test sticky temperature."""
-        entity = MysaClimate(mock_coordinator, "device1", {}, mock_api, mock_entry)
-        entity.async_write_ha_state = MagicMock()
+        entity = make_entity(MysaClimate)
 
         # Cloud = 20
-        mock_coordinator.data = {"device1": {"stpt": 20.0}}
+        device_state(stpt=20.0)
         assert entity.target_temperature == 20.0
 
         # Set to 22.5
@@ -109,18 +155,17 @@ class TestOptimisticClimate:
         mock_api.set_target_temperature.assert_called_with("device1", 22.5)
 
         # Cloud update (22.5) -> Convergence
-        mock_coordinator.data = {"device1": {"stpt": 22.5}}
+        device_state(stpt=22.5)
         assert entity.target_temperature == 22.5
         assert "target_temperature" not in entity._pending_updates
 
     @pytest.mark.asyncio
-    async def test_sticky_hvac_mode(self, mock_coordinator, mock_api, mock_entry):
+    async def test_sticky_hvac_mode(self, device_state, make_entity, frozen_clock):
         """Test sticky HVAC mode."""
-        entity = MysaClimate(mock_coordinator, "device1", {}, mock_api, mock_entry)
-        entity.async_write_ha_state = MagicMock()
+        entity = make_entity(MysaClimate)
 
         # Cloud = OFF (1)
-        mock_coordinator.data = {"device1": {"md": 1}}
+        device_state(md=1)
         assert entity.hvac_mode == HVACMode.OFF
 
         # Set to HEAT
@@ -128,17 +173,16 @@ class TestOptimisticClimate:
         assert entity.hvac_mode == HVACMode.HEAT
 
         # Expiration
-        with patch("time.time", return_value=time.time() + 31):
-            assert entity.hvac_mode == HVACMode.OFF  # Reverts to Cloud (OFF)
+        frozen_clock["now"] += 31
+        assert entity.hvac_mode == HVACMode.OFF  # Reverts to Cloud (OFF)
 
 
 class TestCoverageEdgeCases:
     """Test edge cases for 100% coverage."""
 
-    @pytest.mark.asyncio
-    async def test_switch_none_data(self, mock_coordinator, mock_api, mock_entry):
+    def test_switch_none_data(self, mock_coordinator, make_entity):
         """Test switch with None coordinator data."""
-        entity = MysaLockSwitch(mock_coordinator, "device1", {}, mock_api, mock_entry)
+        entity = make_entity(MysaLockSwitch)
 
         mock_coordinator.data = None
         assert entity.is_on is False
@@ -148,52 +192,43 @@ class TestCoverageEdgeCases:
 
     @pytest.mark.asyncio
     async def test_select_expiration_convergence(
-        self, mock_coordinator, mock_api, mock_entry
+        self, device_state, make_entity, frozen_clock
     ):
         """Test select expiration and convergence branches."""
-        entity = MysaHorizontalSwingSelect(
-            mock_coordinator, "device1", {}, mock_api, mock_entry
-        )
-        entity.async_write_ha_state = MagicMock()
+        entity = make_entity(MysaHorizontalSwingSelect)
 
         # 1. Expiration
-        mock_coordinator.data = {"device1": {"SwingStateHorizontal": 6}}  # Center (6)
+        device_state(SwingStateHorizontal=6)  # Center (6)
         await entity.async_select_option("left")
         assert entity.current_option == "left"
 
-        with patch("time.time", return_value=time.time() + 31):
-            assert entity.current_option == "center"  # Reverts to cloud
+        frozen_clock["now"] += 31
+        assert entity.current_option == "center"  # Reverts to cloud
 
         # 2. Convergence
         entity._pending_option = "left"
-        entity._pending_timestamp = time.time()
+        entity._pending_timestamp = frozen_clock["now"]
 
         # Cloud updates to 'left' (4)
-        mock_coordinator.data = {"device1": {"SwingStateHorizontal": 4}}
+        device_state(SwingStateHorizontal=4)
         assert entity.current_option == "left"
         assert entity._pending_option is None  # Should clear on convergence
 
-    @pytest.mark.asyncio
-    async def test_number_convergence(self, mock_coordinator, mock_api, mock_entry):
+    def test_number_convergence(self, device_state, make_entity):
         """Test number convergence."""
-        entity = MysaMinBrightnessNumber(
-            mock_coordinator, "device1", {}, mock_api, mock_entry
-        )
-        entity.async_write_ha_state = MagicMock()
+        entity = make_entity(MysaMinBrightnessNumber)
 
         entity._pending_value = 50.0
         entity._pending_time = time.time()
 
         # Cloud updates to 50
-        mock_coordinator.data = {"device1": {"MinBrightness": 50}}
+        device_state(MinBrightness=50)
         assert entity.native_value == 50.0
         assert entity._pending_value is None
 
-    @pytest.mark.asyncio
-    async def test_climate_edge_cases(self, mock_coordinator, mock_api, mock_entry):
-        """Test climate None data and exceptions."""
-        entity = MysaClimate(mock_coordinator, "device1", {}, mock_api, mock_entry)
-        entity.async_write_ha_state = MagicMock()
+    def test_climate_edge_cases(self, mock_coordinator, make_entity):
+        """Test climate properties with None coordinator data."""
+        entity = make_entity(MysaClimate)
 
         # 1. None Data
         mock_coordinator.data = None
@@ -206,36 +241,70 @@ class TestCoverageEdgeCases:
         # Then it checks data again (line 239). Returns IDLE.
         assert entity.hvac_action == HVACAction.IDLE
 
-        # 2. Extract Value Edge Cases (Nested 'v' is None)
-        mock_coordinator.data = {"device1": {"test_key": {"v": None, "Id": 999}}}
-        val = entity._extract_value(mock_coordinator.data["device1"], ["test_key"])
-        assert val == 999
+    @pytest.mark.parametrize(
+        ("payload", "keys", "expected"),
+        [
+            ({"test_key": {"v": None, "Id": 999}}, ["test_key"], 999),
+            ({"test_key": {"v": 5}}, ["test_key"], 5),
+            ({"test_key": 42}, ["test_key"], 42),
+            ({"alt": 7}, ["test_key", "alt"], 7),
+            ({}, ["test_key"], None),
+            (None, ["test_key"], None),
+        ],
+        ids=["id_fallback", "nested_v", "plain", "second_key", "missing", "none"],
+    )
+    def test_climate_extract_value(self, make_entity, payload, keys, expected):
+        """Test climate _extract_value across the state shapes it accepts."""
+        entity = make_entity(MysaClimate)
+        assert entity._extract_value(payload, keys) == expected
 
-        # 3. Exception Handling
-        mock_api.set_target_temperature.side_effect = Exception("API Error")
-        # Should raise HomeAssistantError
-        with pytest.raises(HomeAssistantError) as exc:
-            await entity.async_set_temperature(temperature=20.0)
-        assert exc.value.translation_key == "set_temperature_failed"
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("api_attr", "entity_method", "args", "kwargs", "translation_key"),
+        [
+            (
+                "set_target_temperature",
+                "async_set_temperature",
+                (),
+                {"temperature": 20.0},
+                "set_temperature_failed",
+            ),
+            (
+                "set_hvac_mode",
+                "async_set_hvac_mode",
+                (HVACMode.OFF,),
+                {},
+                "set_hvac_mode_failed",
+            ),
+        ],
+        ids=["temperature", "hvac_mode"],
+    )
+    async def test_climate_api_errors(
+        self,
+        mock_api,
+        make_entity,
+        api_attr,
+        entity_method,
+        args,
+        kwargs,
+        translation_key,
+    ):
+        """Test climate setters wrap API exceptions in HomeAssistantError."""
+        entity = make_entity(MysaClimate)
+        getattr(mock_api, api_attr).side_effect = Exception("API Error")
 
-        mock_api.set_hvac_mode.side_effect = Exception("API Error")
-        # Should raise HomeAssistantError
         with pytest.raises(HomeAssistantError) as exc:
-            await entity.async_set_hvac_mode(HVACMode.OFF)
-        assert exc.value.translation_key == "set_hvac_mode_failed"
+            await getattr(entity, entity_method)(*args, **kwargs)
+        assert exc.value.translation_key == translation_key
 
-    @pytest.mark.asyncio
-    async def test_climate_convergence_exact(
-        self, mock_coordinator, mock_api, mock_entry
-    ):
+    def test_climate_convergence_exact(self, device_state, make_entity):
         """Test climate convergence with exact match logic."""
-        entity = MysaClimate(mock_coordinator, "device1", {}, mock_api, mock_entry)
-        entity.async_write_ha_state = MagicMock()
+        entity = make_entity(MysaClimate)
 
         # Test int/float match logic in _get_sticky_value
         entity._set_sticky_value("target_temperature", 20.0)
 
-        mock_coordinator.data = {"device1": {"stpt": 20}}
+        device_state(stpt=20)
         # This triggers the isinstance(val, (int, float)) check
         assert entity.target_temperature == 20.0
         assert "target_temperature" not in entity._pending_updates
@@ -248,6 +317,6 @@ class TestCoverageEdgeCases:
         # We can't easily test generic attr via public property without adding one
         # But we can test hvac_mode enum match
         entity._set_sticky_value("hvac_mode", HVACMode.HEAT)
-        mock_coordinator.data = {"device1": {"md": 3}}  # Heat
+        device_state(md=3)  # Heat
         assert entity.hvac_mode == HVACMode.HEAT
         assert "hvac_mode" not in entity._pending_updates
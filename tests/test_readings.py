@@ -2,8 +2,20 @@
 
 import struct
 
+import pytest
+
 from custom_components.mysa.readings import parse_batch_readings
 
+_BODY_STRUCT = struct.Struct("<LhhhbbhhhHbb")
+
+# Shared 22-byte reading body (sensor 23.6, ambient 21.1 ...)
+COMMON_BODY = _BODY_STRUCT.pack(
+    1769542000, 236, 211, 210, 44, 0, 10, 10, 300, 5000, 29, 0
+)
+
+# One complete V0 reading: header, body, one trailing byte
+_V0_READING = b"\xca\xa0\x00" + COMMON_BODY + b"\x01"
+
 
 def test_parse_batch_readings_invalid():
     """Test parsing empty or invalid readings."""
@@ -12,106 +24,94 @@ def test_parse_batch_readings_invalid():
     # Wrong magic at start
     assert parse_batch_readings(b"\x00\x00\x00" + b"A" * 23) == []
     # Magic mismatch inside loop
-    reading0 = (
-        b"\xca\xa0\x00"
-        + struct.pack("<LhhhbbhhhHbb", 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1)
-        + b"\x01"
-    )
-    assert len(parse_batch_readings(reading0 + b"\x00\x00\x00" + b"A" * 23)) == 1
+    assert len(parse_batch_readings(_V0_READING + b"\x00\x00\x00" + b"A" * 23)) == 1
     # Version mismatch inside loop
-    assert len(parse_batch_readings(reading0 + b"\xca\xa0\x03" + b"A" * 30)) == 1
-
-
-def test_parse_batch_v0():
-    """Test parsing V0 readings."""
-    # CA A0 00 (Ver 0)
-    data = (
-        b"\xca\xa0\x00"
-        + struct.pack(
-            "<LhhhbbhhhHbb", 1769542000, 236, 211, 210, 44, 0, 10, 10, 300, 5000, 29, 0
-        )
-        + b"\x01"
-    )
-    parsed = parse_batch_readings(data)
+    assert len(parse_batch_readings(_V0_READING + b"\xca\xa0\x03" + b"A" * 30)) == 1
+
+
+@pytest.mark.parametrize(
+    ("version", "tail", "expected"),
+    [
+        (0, b"\x01", {"ambTemp": 21.1, "unknown2": 1}),
+        (1, struct.pack("<hB", 240, 2), {"Voltage": 240}),
+        (3, struct.pack("<hh3sB", 244, 5090, b"\x00\x00\x00", 4), {"Current": 5.09}),
+        # Unknown version: 3 + 22 bytes is below the 26-byte minimum, so pad
+        (5, b"EXTRA", {"BatchVersion": 5}),
+    ],
+    ids=["v0", "v1_voltage", "v3_current", "unsupported"],
+)
+def test_parse_batch_versions(version, tail, expected):
+    """Test parsing a single reading of each batch version."""
+    parsed = parse_batch_readings(b"\xca\xa0" + bytes([version]) + COMMON_BODY + tail)
     assert len(parsed) == 1
-    r = parsed[0]
-    assert r["ambTemp"] == 21.1
-    assert r["unknown2"] == 1
+    assert {key: parsed[0][key] for key in expected} == expected
 
 
-def test_parse_batch_v1():
-    """Test parsing V1 readings (Voltage)."""
-    # CA A0 01 (Ver 1)
-    data = (
-        b"\xca\xa0\x01"
-        + struct.pack(
-            "<LhhhbbhhhHbb", 1769542001, 236, 211, 210, 44, 0, 10, 10, 300, 5000, 29, 0
-        )
-        + struct.pack("<hB", 240, 2)
-    )
-    parsed = parse_batch_readings(data)
-    assert len(parsed) == 1
-    assert parsed[0]["Voltage"] == 240
+# (min, max) for each field of the <LhhhbbhhhHbb body, in pack order
+_I8 = (-(2**7), 2**7 - 1)
+_I16 = (-(2**15), 2**15 - 1)
+_FIELD_LIMITS = [(0, 2**32 - 1), _I16, _I16, _I16, _I8, _I8]
+_FIELD_LIMITS += [_I16, _I16, _I16, (0, 2**16 - 1), _I8, _I8]
 
 
-def test_parse_batch_v3():
-    """Test parsing V3 readings (Voltage + Current)."""
-    # CA A0 03 (Ver 3)
-    data = (
-        b"\xca\xa0\x03"
-        + struct.pack(
-            "<LhhhbbhhhHbb", 1769542003, 236, 211, 210, 44, 50, 10, 10, 300, 5000, 29, 1
-        )
-        + struct.pack("<hh3sB", 244, 5090, b"\x00\x00\x00", 4)
+@pytest.mark.parametrize(
+    "fields",
+    [tuple(lo for lo, _ in _FIELD_LIMITS), tuple(hi for _, hi in _FIELD_LIMITS)],
+    ids=["minimum", "maximum"],
+)
+def test_parse_batch_field_limits(fields):
+    """Test each packed field decodes and scales correctly at its type limits."""
+    parsed = parse_batch_readings(
+        b"\xca\xa0\x00" + _BODY_STRUCT.pack(*fields) + b"\x00"
     )
-    parsed = parse_batch_readings(data)
-    assert len(parsed) == 1
-    assert parsed[0]["Current"] == 5.09
-
-
-def test_parse_batch_multiple_and_mismatch():
-    """Test parsing multiple readings and handling mismatches."""
-    # First valid Ver 0
-    reading0 = (
-        b"\xca\xa0\x00"
-        + struct.pack(
-            "<LhhhbbhhhHbb", 1769542000, 236, 211, 210, 44, 0, 10, 10, 300, 5000, 29, 0
+    assert parsed == [
+        {
+            "Timestamp": fields[0],
+            "SensorTemp": fields[1] / 10.0,
+            "ambTemp": fields[2] / 10.0,
+            "stpt": fields[3] / 10.0,
+            "hum": fields[4],
+            "DutyCycle": fields[5],
+            "HeatSink": fields[8] / 10.0,
+            "rssi": -fields[10],
+            "BatchVersion": 0,
+            "unknown2": 0,
+        }
+    ]
+
+
+# Voltages of the consecutive V1 readings in the batch fixture
+_BATCH_VOLTAGES = (239, 240, 241)
+
+
+@pytest.fixture(name="parsed_v1_batch", scope="module")
+def parsed_v1_batch_fixture():
+    """Parse one buffer of back-to-back V1 readings once for the module."""
+    return parse_batch_readings(
+        b"".join(
+            b"\xca\xa0\x01" + COMMON_BODY + struct.pack("<hB", voltage, index)
+            for index, voltage in enumerate(_BATCH_VOLTAGES)
         )
-        + b"\x01"
     )
 
-    # Second reading with wrong magic
-    data_bad_magic = reading0 + b"\x00\x00\x00" + b"A" * 23
-    assert len(parse_batch_readings(data_bad_magic)) == 1
 
-    # Second reading with wrong version
-    data_bad_ver = reading0 + b"\xca\xa0\x03" + b"A" * 30
-    assert len(parse_batch_readings(data_bad_ver)) == 1
+def test_parse_batch_consecutive_count(parsed_v1_batch):
+    """Test every reading in a same-version batch is parsed."""
+    assert len(parsed_v1_batch) == len(_BATCH_VOLTAGES)
 
 
-def test_parse_batch_unsupported_version():
-    """Test parsing valid magic but unknown version."""
-    data = b"\xca\xa0\x05" + struct.pack(
-        "<LhhhbbhhhHbb", 1769542005, 236, 211, 210, 44, 0, 10, 10, 300, 5000, 29, 0
-    )
-    # len is 3 + 22 = 25. Still too short (min 26).
-    data += b"EXTRA"  # Total 30.
-    parsed = parse_batch_readings(data)
-    assert len(parsed) == 1
-    assert parsed[0]["BatchVersion"] == 5
+@pytest.mark.parametrize(("index", "voltage"), enumerate(_BATCH_VOLTAGES))
+def test_parse_batch_consecutive_offsets(parsed_v1_batch, index, voltage):
+    """Test each reading in a batch is decoded from its own offset."""
+    assert parsed_v1_batch[index]["Voltage"] == voltage
+    assert parsed_v1_batch[index]["unknown2"] == index
+    assert parsed_v1_batch[index]["ambTemp"] == 21.1
 
 
 def test_parse_batch_truncated_second_packet():
     """Test when second packet in batch is truncated."""
-    reading0 = (
-        b"\xca\xa0\x00"
-        + struct.pack("<LhhhbbhhhHbb", 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1)
-        + b"\x01"
-    )
-    # Start of second packet but truncated
-    data = (
-        reading0 + b"\xca\xa0\x00" + b"ABC"
-    )  # Passes initial magic/ver check but fails unpack
+    # Start of second packet passes the magic/ver check but fails unpack
+    data = _V0_READING + b"\xca\xa0\x00" + b"ABC"
     parsed = parse_batch_readings(data)
     assert len(parsed) == 1
 
@@ -138,11 +138,7 @@ def test_parse_batch_struct_error():
     # WAIT! ver 0 needs 1 more byte at end. ver 1 needs 3. ver 3 needs 8.
     # If we have 26 bytes, Ver 3 header (3) + body (22) = 25. 1 byte left.
     # But Ver 3 wants 8 bytes at 129!
-    data = (
-        b"\xca\xa0\x03"
-        + struct.pack("<LhhhbbhhhHbb", 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1)
-        + b"A"
-    )
+    data = b"\xca\xa0\x03" + COMMON_BODY + b"A"
     # This will fail at line 129: struct.unpack_from('<hh3sB', readings, offset).
     # But there is no try/except there! I should add it.
     assert parse_batch_readings(data) == []  # Should fail gracefully or I fix code
@@ -1,47 +1,74 @@
 """Tests for Mysa Realtime Coordinator."""
 
 import asyncio
-from unittest.mock import AsyncMock, MagicMock, patch
+from itertools import count
+from unittest.mock import AsyncMock, MagicMock, patch, sentinel
 
 import pytest
 
 from custom_components.mysa import mqtt
+from custom_components.mysa.const import MQTT_INFLIGHT_TIMEOUT
 from custom_components.mysa.realtime import MysaRealtime
 
 
 @pytest.fixture
 def mock_hass():
-    hass = MagicMock()
-    hass.async_add_executor_job = AsyncMock(side_effect=lambda f, *args: f(*args))
-    return hass
+    # Payload parsing runs on the event loop; no executor stub needed
+    return MagicMock()
+
+
+# Only the websocket methods the code under test touches
+_WS_SPEC = ["send", "recv", "close"]
+
+# Parsed CONNACK accepting the connection
+_CONNACK = mqtt.ConnackPacket(0, 0)
+
+
+async def _recv_nothing():
+    """WebSocket recv that never receives a frame."""
+    await asyncio.Event().wait()
+
+
+@pytest.fixture(autouse=True)
+def mock_ssl_context():
+    """Skip loading the CA bundle; connect_websocket is mocked throughout."""
+    with patch(
+        "custom_components.mysa.realtime.create_ssl_context",
+        new_callable=AsyncMock,
+        return_value=sentinel.ssl_context,
+    ):
+        yield
+
+
+@pytest.fixture
+def rt(mock_hass):
+    """Coordinator with no-op URL and update callbacks."""
+    return MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
 
 
 @pytest.fixture
 def mock_ws():
-    ws = AsyncMock()
-    ws.close = AsyncMock()
+    ws = AsyncMock(spec=_WS_SPEC)
     ws.send = AsyncMock()
     ws.recv = AsyncMock()
+    ws.close = AsyncMock()
     return ws
 
 
 @pytest.mark.asyncio
 class TestMysaRealtime:
-    async def test_initialization(self, mock_hass):
+    async def test_initialization(self, rt):
         """Test initialization."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         assert rt.is_running is False
         assert rt._devices_ids == []
 
-    async def test_start_stop(self, mock_hass):
+    async def test_start_stop(self, rt):
         """Test start and stop lifecycle."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
 
-        # Mock _mqtt_listener_loop to run forever until cancelled
+        # Mock _mqtt_listener_loop to block until cancelled (no timer needed)
         async def mock_loop():
             try:
-                while True:
-                    await asyncio.sleep(0.1)
+                await asyncio.get_running_loop().create_future()
             except asyncio.CancelledError:
                 pass
 
@@ -56,9 +83,8 @@ class TestMysaRealtime:
             await rt.stop()
             assert not rt.is_running
 
-    async def test_wait_until_connected(self, mock_hass):
+    async def test_wait_until_connected(self, rt):
         """Test wait_until_connected success and timeout."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
 
         # Test timeout (default event state is unset)
         assert await rt.wait_until_connected(timeout=0.1) is False
@@ -67,27 +93,25 @@ class TestMysaRealtime:
         rt._mqtt_connected.set()
         assert await rt.wait_until_connected(timeout=0.1) is True
 
-    async def test_listener_loop_flow(self, mock_hass):
+    async def test_listener_loop_flow(self, rt):
         """Test listener loop calls listen and handles errors."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
-        rt._mqtt_reconnect_delay = 0.01  # type: ignore[assignment] # Fast retry
+        rt._mqtt_reconnect_delay = 0  # type: ignore[assignment] # Immediate retry
 
-        # Mock listen to fail once then succeed (which just returns normally)
+        # Fail once, then return normally and stop the loop from inside listen
         listen_mock = AsyncMock(side_effect=[Exception("Connection failed"), None])
 
-        # Only run loop for a short time
-        async def run_loop_briefly():
-            task = asyncio.create_task(rt._mqtt_listener_loop())
-            await asyncio.sleep(0.05)
-            rt._mqtt_should_reconnect = False
-            # Wait for it to exit
-            await task
+        async def listen():
+            try:
+                await listen_mock()
+            finally:
+                if listen_mock.call_count == 2:
+                    rt._mqtt_should_reconnect = False
 
-        with patch.object(rt, "_mqtt_listen", side_effect=listen_mock):
+        with patch.object(rt, "_mqtt_listen", side_effect=listen):
             rt._mqtt_should_reconnect = True
-            await run_loop_briefly()
+            await asyncio.wait_for(rt._mqtt_listener_loop(), 1.0)
 
-            assert listen_mock.call_count >= 2
+            assert listen_mock.call_count == 2
 
     async def test_mqtt_listen_connect_flow(self, mock_hass, mock_ws):
         """Test successful connection flow."""
@@ -105,33 +129,44 @@ class TestMysaRealtime:
 
             await rt._mqtt_listen()
 
-            mock_connect.assert_called_with("https://test.url")
+            mock_connect.assert_called_with("https://test.url", sentinel.ssl_context)
             rt._perform_mqtt_handshake.assert_called_once()
             rt._run_mqtt_loop.assert_called_once()
             mock_ws.close.assert_called()
 
-    async def test_perform_handshake_success(self, mock_hass, mock_ws):
-        """Test successful handshake."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
-        rt.set_devices(["dev1"])
+    async def test_perform_handshake_success(self, rt, mock_ws):
+        """Test all devices are subscribed with a single SUBACK-checked packet."""
+        rt.set_devices(["dev1", "dev2", "dev3"])
 
-        # Setup responses: Connack, Suback
-        connack = mqtt.ConnackPacket(0, 0)
-        suback = mqtt.SubackPacket(1, [0])  # PacketID 1, QoS 0 check?
-
-        # We need to assume parse_mqtt_packet returns objects.
-        # Ideally we'd use real bytes but mocking parser is easier
+        # /out and /in per device, all granted at QoS 1
+        suback = mqtt.SubackPacket(1, [1] * 6)
         with patch(
             "custom_components.mysa.realtime.parse_mqtt_packet",
-            side_effect=[connack, suback],
+            side_effect=[_CONNACK, suback],
         ):
             await rt._perform_mqtt_handshake(mock_ws)
 
             assert mock_ws.send.call_count == 2  # Connect + Subscribe
+            assert mock_ws.send.call_args_list[0].args == (rt._connect_pkt,)
+
+    @pytest.mark.parametrize(
+        "return_codes", [[1, 1, 1, 0x80], [1, 1]], ids=["refused", "short"]
+    )
+    async def test_perform_handshake_suback_rejected(self, rt, mock_ws, return_codes):
+        """Test handshake fails unless every topic is granted."""
+        rt.set_devices(["dev1", "dev2"])
+
+        with (
+            patch(
+                "custom_components.mysa.realtime.parse_mqtt_packet",
+                side_effect=[_CONNACK, mqtt.SubackPacket(1, return_codes)],
+            ),
+            pytest.raises(RuntimeError, match="Subscription rejected"),
+        ):
+            await rt._perform_mqtt_handshake(mock_ws)
 
-    async def test_perform_handshake_connack_fail(self, mock_hass, mock_ws):
+    async def test_perform_handshake_connack_fail(self, rt, mock_ws):
         """Test handshake fails if not Connack."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
 
         # Return None or other packet type to simulate failure
         with (
@@ -144,40 +179,55 @@ class TestMysaRealtime:
 
     async def test_run_mqtt_loop_msg_processing(self, mock_hass, mock_ws):
         """Test message processing loop."""
-        ready_state = {"temp": 20}
         on_update = AsyncMock()
         rt = MysaRealtime(mock_hass, AsyncMock(), on_update)
 
-        # Mock payload
-        class MockPkt:
-            topic = "/v1/dev/dev1/out"
-            payload = b'{"msg": 44, "body": {"state": {"temp": 20}}}'
-
         # PublishPacket(dup, qos, retain, topic, packetid, payload)
-        pkt = mqtt.PublishPacket(0, 0, 0, MockPkt.topic, None, MockPkt.payload)
-
-        # Return packet then raise timeout/error to exit loop
-        async def recv_side_effect():
-            if mock_ws.recv.call_count == 1:
-                return b"packet_data"
-            # Trigger exit
-            raise Exception("Stop loop")
+        pkt = mqtt.PublishPacket(
+            0,
+            0,
+            0,
+            "/v1/dev/dev1/out",
+            None,
+            b'{"msg": 44, "body": {"state": {"temp": 20}}}',
+        )
 
-        mock_ws.recv.side_effect = recv_side_effect
+        # Return one frame, then raise to exit the loop
+        mock_ws.recv.side_effect = [b"packet_data", Exception("Stop loop")]
 
-        with patch(
-            "custom_components.mysa.realtime.parse_mqtt_packet", return_value=pkt
+        with (
+            patch(
+                "custom_components.mysa.realtime.parse_mqtt_packets",
+                return_value=[pkt],
+            ),
+            pytest.raises(Exception, match="Stop loop"),
         ):
-            try:
-                await rt._run_mqtt_loop(mock_ws)
-            except Exception:
-                pass
+            await rt._run_mqtt_loop(mock_ws)
 
-            on_update.assert_called_with("dev1", {"temp": 20}, True)
+        on_update.assert_called_with("dev1", {"temp": 20}, True)
 
-    async def test_extract_state_update(self, mock_hass):
+    async def test_run_mqtt_loop_multiple_packets_per_frame(self, mock_hass, mock_ws):
+        """Test every packet in a single WebSocket frame is processed."""
+        on_update = AsyncMock()
+        rt = MysaRealtime(mock_hass, AsyncMock(), on_update)
+
+        frame = (
+            mqtt.publish("/v1/dev/dev1/out", False, 0, False, b'{"body":{"sp":20}}')
+            + mqtt.publish("/v1/dev/dev2/out", False, 0, False, b'{"body":{"sp":21}}')
+            + b"\xd0\x00"  # PINGRESP
+        )
+        mock_ws.recv.side_effect = [frame, Exception("Stop loop")]
+
+        with pytest.raises(Exception, match="Stop loop"):
+            await rt._run_mqtt_loop(mock_ws)
+
+        assert on_update.await_args_list == [
+            (("dev1", {"sp": 20}, True),),
+            (("dev2", {"sp": 21}, True),),
+        ]
+
+    async def test_extract_state_update(self, rt):
         """Test payload extraction."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
 
         # Case 1: Direct state
         payload = {"msg": 44, "body": {"state": {"sp": 20}}}
@@ -230,9 +280,8 @@ class TestMysaRealtime:
                 assert mock_ws.send.call_count == 3  # Connect, Sub, Pub
                 assert mock_ws.close.call_count == 1
 
-    async def test_send_command_connected(self, mock_hass, mock_ws):
+    async def test_send_command_connected(self, rt, mock_ws):
         """Test send_command uses persistent connection if available."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         rt._mqtt_ws = mock_ws  # Simulate connected
 
         with patch.object(
@@ -244,9 +293,83 @@ class TestMysaRealtime:
             # Should call ws.send
             assert mock_ws.send.called
 
-    async def test_send_command_fallback(self, mock_hass, mock_ws):
+    async def test_send_command_puback_frees_window(self, rt, mock_ws):
+        """Test each command takes a packet ID slot until its PUBACK arrives."""
+        rt._mqtt_ws = mock_ws
+        rt._inflight_window = asyncio.Semaphore(2)
+
+        await rt.send_command("dev1", {"a": 1}, "u1")
+        await rt.send_command("dev1", {"a": 2}, "u1")
+
+        assert list(rt._pending_acks) == [2, 3]
+        assert rt._inflight_window.locked()
+
+        # PUBACK for packet 2, then stop the loop
+        mock_ws.recv.side_effect = [b"\x40\x02\x00\x02", Exception("Stop loop")]
+        with pytest.raises(Exception, match="Stop loop"):
+            await rt._run_mqtt_loop(mock_ws)
+        await asyncio.sleep(0)  # Let the ack's done callback run
+
+        assert list(rt._pending_acks) == [3]
+        assert not rt._inflight_window.locked()
+
+        # Duplicate or unknown PUBACKs are ignored
+        rt._resolve_puback(2)
+        assert list(rt._pending_acks) == [3]
+
+    async def test_packet_ids_wrap_and_skip_pending(self, rt):
+        """Test packet IDs wrap back to 2 and skip those awaiting a PUBACK."""
+        assert rt._next_packet_id() == 2
+
+        rt._last_packet_id = 0xFFFE
+        rt._pending_acks = {2: MagicMock(), 3: MagicMock()}
+        assert rt._next_packet_id() == 0xFFFF
+        assert rt._next_packet_id() == 4
+
+    async def test_send_command_full_window_falls_back(self, rt, mock_ws, caplog):
+        """Test a window of unacknowledged commands diverts to one-off."""
+        assert rt._inflight_timeout == MQTT_INFLIGHT_TIMEOUT
+        rt._mqtt_ws = mock_ws
+        rt._inflight_window = asyncio.Semaphore(1)
+        rt._inflight_timeout = 0.01
+        await rt.send_command("dev1", {"a": 1}, "u1")
+
+        with patch.object(
+            rt, "_send_one_off_command", new_callable=AsyncMock
+        ) as mock_one_off:
+            await rt.send_command("dev1", {"a": 2}, "u1")
+
+        mock_one_off.assert_awaited_once()
+        mock_ws.send.assert_called_once()
+        assert list(rt._pending_acks) == [2]
+        assert "MQTT_INFLIGHT_TIMEOUT (0.01s): 1 commands" in caplog.text
+
+    async def test_mqtt_listen_cancels_pending_acks(self, rt, mock_ws):
+        """Test a dropped connection releases commands still awaiting PUBACK."""
+        rt._mqtt_ws = mock_ws
+        rt._inflight_window = asyncio.Semaphore(1)
+        await rt.send_command("dev1", {"a": 1}, "u1")
+        ack = rt._pending_acks[2]
+
+        rt._perform_mqtt_handshake = AsyncMock(  # type: ignore[method-assign]
+            side_effect=Exception("Dropped")
+        )
+        with (
+            patch(
+                "custom_components.mysa.realtime.connect_websocket",
+                return_value=mock_ws,
+            ),
+            pytest.raises(Exception, match="Dropped"),
+        ):
+            await rt._mqtt_listen()
+        await asyncio.sleep(0)  # Let the ack's done callback run
+
+        assert ack.cancelled()
+        assert rt._pending_acks == {}
+        assert not rt._inflight_window.locked()
+
+    async def test_send_command_fallback(self, rt, mock_ws):
         """Test send_command falls back to one-off if ws fails or is missing."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
 
         # Case 1: WS missing
         rt._mqtt_ws = None
@@ -264,23 +387,22 @@ class TestMysaRealtime:
         ) as mock_send_off:
             await rt.send_command("dev1", {"a": 1}, "u1")
             mock_send_off.assert_called_once()
+        # The failed publish gives back its in-flight slot
+        assert rt._pending_acks == {}
 
-    async def test_send_command_no_wrap_persistent(self, mock_hass, mock_ws):
+    async def test_send_command_no_wrap_persistent(self, rt, mock_ws):
         """Test send_command with wrap=False via persistent connection."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         rt._mqtt_ws = mock_ws
         await rt.send_command("dev1", {"raw": "data"}, "u1", wrap=False)
         assert mock_ws.send.called
 
-    async def test_send_one_off_no_user(self, mock_hass):
+    async def test_send_one_off_no_user(self, rt):
         """Test _send_one_off_command handles missing user ID (coverage)."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         # This hits line 407-408
         await rt._send_one_off_command("dev1", {}, None, 44, 100, True)
 
-    async def test_extract_state_update_nested_complex(self, mock_hass):
+    async def test_extract_state_update_nested_complex(self, rt):
         """Test complex nested structure extraction."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         payload = {"msg": 44, "body": {"cmd": [{"sp": 25}, {"invalid": 2}]}}
         # It updates existing state with cmd items (if no state key)
         res = rt._extract_state_update(payload)
@@ -289,9 +411,8 @@ class TestMysaRealtime:
         assert res["sp"] == 25
         assert res["invalid"] == 2
 
-    async def test_process_exception_handling(self, mock_hass):
+    async def test_process_exception_handling(self, rt):
         """Test exception handling in process_mqtt_publish."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
 
         class MockPkt:
             topic = "topic"
@@ -306,53 +427,28 @@ class TestMysaRealtime:
             # Verify no crash
             # We can verify logging if we mock it, or just ensure no raise logic holds safely.
 
-    async def test_run_mqtt_loop_keepalive_failure(self, mock_hass, mock_ws):
+    async def test_run_mqtt_loop_keepalive_failure(self, rt, mock_ws):
         """Test keepalive failure."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
+        mock_ws.recv.side_effect = _recv_nothing
+        mock_ws.send.side_effect = Exception("Ping Fail")
 
-        # We use a custom wait implementation to control the loop flow
-        loop_state = {"iters": 0}
+        # Every clock read is past the ping interval, so the first wakeup pings
+        rt._monotonic = count(100, 100).__next__
+        with pytest.raises(Exception, match="Ping Fail"):
+            await rt._run_mqtt_loop(mock_ws)
 
-        async def mock_recv():
-            loop_state["iters"] += 1
-            if loop_state["iters"] > 2:
-                raise Exception("Stop Loop")
-            await asyncio.sleep(0.01)  # fast wait
-            raise TimeoutError()
+    async def test_run_mqtt_loop_keepalive_success(self, rt, mock_ws):
+        """Test keepalive pings while a single recv stays pending."""
+        mock_ws.recv.side_effect = _recv_nothing
+        mock_ws.send.side_effect = [None, None, Exception("Stop Loop")]
 
-        mock_ws.recv.side_effect = mock_recv
+        rt._monotonic = count(100, 100).__next__
+        with pytest.raises(Exception, match="Stop Loop"):
+            await rt._run_mqtt_loop(mock_ws)
 
-        # Mock time to force ping
-        with patch("time.time", side_effect=[100, 200, 300, 400]):
-            mock_ws.send.side_effect = Exception("Ping Fail")
-
-            try:
-                await rt._run_mqtt_loop(mock_ws)
-            except Exception as e:
-                # expecting "Ping Fail" to bubble up
-                assert str(e) == "Ping Fail"
-
-    async def test_run_mqtt_loop_keepalive_success(self, mock_hass, mock_ws):
-        """Test keepalive success path."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
-        loop_state = {"iters": 0}
-
-        async def mock_recv():
-            loop_state["iters"] += 1
-            if loop_state["iters"] > 2:
-                raise Exception("Stop Loop")
-            await asyncio.sleep(0.01)
-            raise TimeoutError()
-
-        mock_ws.recv.side_effect = mock_recv
-
-        with patch("time.time", side_effect=[100, 200, 300, 400]):
-            try:
-                await rt._run_mqtt_loop(mock_ws)
-            except Exception:
-                pass
-            # verify ping sent and no log error
-            mock_ws.send.assert_called()
+        assert mock_ws.send.call_count == 3
+        # The pending recv was reused across pings, then cancelled on exit
+        assert mock_ws.recv.call_count == 1
 
     async def test_mqtt_listen_exception_and_close_fail(self, mock_hass, mock_ws):
         """Test listen exception handling and close exception suppression."""
@@ -377,9 +473,27 @@ class TestMysaRealtime:
             # Verify close was called
             mock_ws.close.assert_called()
 
-    async def test_extract_state_update_fallback(self, mock_hass):
+    async def test_mqtt_listen_handshake_timeout(self, rt, mock_ws):
+        """Test a handshake that never completes is abandoned and closed."""
+        rt._mqtt_handshake_timeout = 0.01
+        rt._perform_mqtt_handshake = (  # type: ignore[method-assign]
+            lambda _ws: _recv_nothing()
+        )
+
+        with (
+            patch(
+                "custom_components.mysa.realtime.connect_websocket",
+                return_value=mock_ws,
+            ),
+            pytest.raises(TimeoutError),
+        ):
+            await rt._mqtt_listen()
+
+        mock_ws.close.assert_called_once()
+        assert not rt._mqtt_connected.is_set()
+
+    async def test_extract_state_update_fallback(self, rt):
         """Test extraction falls back to body if no state/cmd."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         # msg 44, body has data but no state/cmd keys
         payload = {"msg": 44, "body": {"root_key": 1}}
         assert rt._extract_state_update(payload) == {"root_key": 1}
@@ -412,18 +526,16 @@ class TestMysaRealtime:
 
                 on_update.assert_called_with("dev1", {"new": 1}, True)
 
-    async def test_close_websocket_exception(self, mock_hass, mock_ws):
+    async def test_close_websocket_exception(self, rt, mock_ws):
         """Test exception during close is suppressed."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         rt._mqtt_ws = mock_ws
         mock_ws.close.side_effect = Exception("Close error")
 
         await rt._close_websocket()
         assert rt._mqtt_ws is None  # Should be cleared despite error
 
-    async def test_mqtt_listener_loop_cancelled(self, mock_hass):
+    async def test_mqtt_listener_loop_cancelled(self, rt):
         """Test task cancellation in loop."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         rt._mqtt_reconnect_delay = 0
 
         async def mock_listen():
@@ -448,9 +560,8 @@ class TestMysaRealtime:
         ):
             await rt._mqtt_listen()
 
-    async def test_perform_handshake_suback_fail(self, mock_hass, mock_ws):
+    async def test_perform_handshake_suback_fail(self, rt, mock_ws):
         """Test handshake fails if not Suback."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         rt.set_devices(["dev1"])  # Needed to trigger subscribe
 
         connack = mqtt.ConnackPacket(0, 0)
@@ -464,50 +575,31 @@ class TestMysaRealtime:
         ):
             await rt._perform_mqtt_handshake(mock_ws)
 
-    async def test_run_mqtt_loop_pingresp(self, mock_hass, mock_ws):
+    async def test_run_mqtt_loop_pingresp(self, rt, mock_ws):
         """Test PINGRESP handling and parse error."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
+        # PINGRESP, an unparsable frame, then exit
+        mock_ws.recv.side_effect = [b"pingresp", b"garbage", Exception("Stop")]
+        parsed = {b"pingresp": [mqtt.PingrespPacket()], b"garbage": ValueError()}
 
-        # 1. PINGRESP
-        pingresp = mqtt.PingrespPacket()
-        # 2. Parse Error (raise Exception)
-        # 3. Timeout (handled)
-        # 4. Exit
-
-        call_count = 0
+        def parse_side_effect(data):
+            if isinstance(result := parsed[data], Exception):
+                raise result
+            return result
 
-        async def mock_recv():
-            nonlocal call_count
-            call_count += 1
-            if call_count == 1:
-                return b"pingresp"
-            if call_count == 2:
-                return b"garbage"
-            if call_count == 3:
-                raise TimeoutError()
-            raise Exception("Stop")
-
-        mock_ws.recv.side_effect = mock_recv
-
-        with patch("custom_components.mysa.realtime.parse_mqtt_packet") as mock_parse:
-
-            def parse_side_effect(data):
-                if data == b"pingresp":
-                    return pingresp
-                if data == b"garbage":
-                    raise ValueError("Parse Error")
-                return None
-
-            mock_parse.side_effect = parse_side_effect
+        with (
+            patch(
+                "custom_components.mysa.realtime.parse_mqtt_packets",
+                side_effect=parse_side_effect,
+            ) as mock_parse,
+            pytest.raises(Exception, match="Stop"),
+        ):
+            await rt._run_mqtt_loop(mock_ws)
 
-            try:
-                await rt._run_mqtt_loop(mock_ws)
-            except Exception:
-                pass
+        # The parse error was logged and the loop kept receiving
+        assert mock_parse.call_count == 2
 
-    async def test_send_command_missing_user(self, mock_hass):
+    async def test_send_command_missing_user(self, rt):
         """Test send command with missing user ID."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         # Should return early, log error
         await rt.send_command("dev1", {}, None)
         # How to verify? Log capture or coverage check.
@@ -552,9 +644,8 @@ class TestMysaRealtime:
         ):
             await rt.send_command("d", {}, "u")
 
-    async def test_extract_state_update_msg_10(self, mock_hass):
+    async def test_extract_state_update_msg_10(self, rt):
         """Test extraction of MsgType 10 (Boot Status)."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         payload = {
             "msg": 10,
             "ip": "192.168.1.10",
@@ -569,9 +660,8 @@ class TestMysaRealtime:
         res_ver = rt._extract_state_update(payload_ver)
         assert res_ver == {"FirmwareVersion": "1.2.4"}
 
-    async def test_extract_state_update_msg_4(self, mock_hass):
+    async def test_extract_state_update_msg_4(self, rt):
         """Test extraction of MsgType 4 (Logs)."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
 
         # IP Case
         payload_ip = {"msg": 4, "Message": "Some log prefix Local IP: 192.168.1.50"}
@@ -588,13 +678,40 @@ class TestMysaRealtime:
         res_both = rt._extract_state_update(payload_both)
         assert res_both == {"ip": "1.1.1.1", "serial_number": "S1"}
 
+        # Later log lines are not part of the value
+        payload_tail = {"msg": 4, "Message": "Local IP: 10.0.0.2\nWiFi up"}
+        assert rt._extract_state_update(payload_tail) == {"ip": "10.0.0.2"}
+
+        # An empty field doesn't swallow the next label
+        payload_empty = {"msg": 4, "Message": "Local IP: Device Serial: S2"}
+        assert rt._extract_state_update(payload_empty) == {
+            "ip": "",
+            "serial_number": "S2",
+        }
+        payload_empty = {"msg": 4, "Message": "Device Serial:\nLocal IP: 10.0.0.3"}
+        assert rt._extract_state_update(payload_empty) == {
+            "ip": "10.0.0.3",
+            "serial_number": "",
+        }
+
         # Irrelevant log
         payload_none = {"msg": 4, "Message": "Just a log message"}
         assert rt._extract_state_update(payload_none) is None
 
-    async def test_extract_state_update_cmd_only(self, mock_hass):
+    @pytest.mark.parametrize(
+        ("message", "expected"),
+        [
+            ("Local IP:Device Serial: X", {"ip": "", "serial_number": "X"}),
+            ("Local IP:\n10.0.0.2", {"ip": "10.0.0.2"}),
+            ("Device Serial: AB CD", {"serial_number": "AB CD"}),
+        ],
+    )
+    async def test_extract_state_update_msg_4_field_bounds(self, rt, message, expected):
+        """Test MsgType 4 values keep the split-based parser's boundaries."""
+        assert rt._extract_state_update({"msg": 4, "Message": message}) == expected
+
+    async def test_extract_state_update_cmd_only(self, rt):
         """Test extraction fallback to cmd when state is missing."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         payload = {
             "msg": 44,
             "body": {
@@ -606,23 +723,28 @@ class TestMysaRealtime:
         # Should merge items from cmd list
         assert res == {"sp": 21, "m": 1}
 
-    async def test_extract_state_update_key_variant(self, mock_hass):
+    async def test_extract_state_update_cmd_merge(self, rt):
+        """Test multi-key cmd entries merge in order and non-dicts are skipped."""
+        payload = {
+            "msg": 44,
+            "body": {"cmd": [{"md": 3, "tm": -1}, "noise", {"sp": 21, "tm": 5}]},
+        }
+        assert rt._extract_state_update(payload) == {"md": 3, "tm": 5, "sp": 21}
+
+    async def test_extract_state_update_key_variant(self, rt):
         """Test extraction using 'MsgType' key instead of 'msg'."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         payload = {"MsgType": 4, "Message": "Local IP: 192.168.1.99"}
         res = rt._extract_state_update(payload)
         assert res == {"ip": "192.168.1.99"}
 
-    async def test_extract_state_update_invalid_body(self, mock_hass):
+    async def test_extract_state_update_invalid_body(self, rt):
         """Test extraction with invalid body type (not dict)."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         payload = {"msg": 44, "body": "invalid_string_body"}
         res = rt._extract_state_update(payload)
         assert res is None
 
-    async def test_extract_state_update_msg_4_reversed_order(self, mock_hass):
+    async def test_extract_state_update_msg_4_reversed_order(self, rt):
         """Test extraction of MsgType 4 with reversed order (Serial then IP)."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         payload = {
             "msg": 4,
             "Message": "Prefix Device Serial: SN999 Local IP: 10.0.0.99",
@@ -630,16 +752,14 @@ class TestMysaRealtime:
         res = rt._extract_state_update(payload)
         assert res == {"ip": "10.0.0.99", "serial_number": "SN999"}
 
-    async def test_extract_state_update_msg_61(self, mock_hass):
+    async def test_extract_state_update_msg_61(self, rt):
         """Test extraction of MsgType 61 (Firmware Report)."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         payload = {"msg": 61, "version": "2.0.0"}
         res = rt._extract_state_update(payload)
         assert res == {"FirmwareVersion": "2.0.0"}
 
-    async def test_extract_state_update_catchall(self, mock_hass):
+    async def test_extract_state_update_catchall(self, rt):
         """Test catch-all metadata extraction from top-level keys."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
 
         # Test 1: IP in top level
         payload = {"msg": 20, "ip": "10.0.0.1"}
@@ -668,24 +788,23 @@ class TestMysaRealtime:
 
     # --- Gap Fill Tests (Merged) ---
 
-    async def test_extract_state_update_msg_30(self, mock_hass):
+    async def test_extract_state_update_msg_30(self, rt):
         """Test extraction of MsgType 30 (Periodic Update)."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         payload = {
             "msg": 30,
             "body": {"ambTemp": 20.5, "hum": 44, "stpt": 19.0, "mode": 6},
         }
         res = rt._extract_state_update(payload)
         # Should return everything (mode filtering moved to device.py)
-        assert res is not None
+        # without copying the body
+        assert res is payload["body"]
         assert res["ambTemp"] == 20.5
         assert res["mode"] == 6
 
     # --- Gap Fill Tests (Merged) ---
 
-    async def test_extract_state_update_invalid_msg_type(self, mock_hass):
+    async def test_extract_state_update_invalid_msg_type(self, rt):
         """Test extraction with non-numeric msg type (hits exception block)."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
         payload = {"msg": "invalid_int"}
         # Should catch ValueError and return None (since msg_type becomes None)
         assert rt._extract_state_update(payload) is None
@@ -695,9 +814,8 @@ class TestRealtimeException:
     """Test realtime.py exception handling."""
 
     @pytest.mark.asyncio
-    async def test_on_update_exception(self, mock_hass):
+    async def test_on_update_exception(self, rt):
         """Test that exception in _process_mqtt_publish is caught."""
-        rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
 
         # Create a packet with invalid JSON to trigger json.loads exception
         pkt = MagicMock()
@@ -806,10 +924,18 @@ class TestRealtimeCoverage:
         assert realtime._extract_batch_info({"body": {"readings": ""}}) is None
 
 
+@pytest.fixture
+def no_jitter():
+    """Make reconnect sleeps use the full backoff delay."""
+    with patch(
+        "custom_components.mysa.realtime.random.uniform", side_effect=lambda _lo, hi: hi
+    ):
+        yield
+
+
 @pytest.mark.asyncio
-async def test_fibonacci_backoff_sequence(mock_hass):
+async def test_fibonacci_backoff_sequence(rt, no_jitter):
     """Test that the retry delay follows a Fibonacci sequence."""
-    rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
     rt._mqtt_reconnect_delay = 1.0
 
     # Mock _mqtt_listen to always fail
@@ -837,9 +963,8 @@ async def test_fibonacci_backoff_sequence(mock_hass):
 
 
 @pytest.mark.asyncio
-async def test_fibonacci_backoff_cap(mock_hass):
+async def test_fibonacci_backoff_cap(rt, no_jitter):
     """Test that the retry delay is capped at 60s."""
-    rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
     rt._mqtt_reconnect_delay = 55.0
 
     with patch(
@@ -864,9 +989,8 @@ async def test_fibonacci_backoff_cap(mock_hass):
 
 
 @pytest.mark.asyncio
-async def test_fibonacci_reset_on_success(mock_hass):
+async def test_fibonacci_reset_on_success(rt, no_jitter):
     """Test that retry sequence resets on successful connection."""
-    rt = MysaRealtime(mock_hass, AsyncMock(), AsyncMock())
     rt._mqtt_reconnect_delay = 1.0
 
     with patch(
@@ -894,3 +1018,25 @@ async def test_fibonacci_reset_on_success(mock_hass):
 
         sleep_calls = [call.args[0] for call in mock_sleep.call_args_list]
         assert sleep_calls == [1.0, 1.0, 1.0]
+
+
+async def test_backoff_jitter_bounds(rt):
+    """Test each reconnect sleeps between half and all of the backoff delay."""
+    rt._mqtt_reconnect_delay = 8.0
+    rt._mqtt_reconnect_max = 10.0
+
+    with (
+        patch(
+            "custom_components.mysa.realtime.asyncio.sleep", new_callable=AsyncMock
+        ) as mock_sleep,
+        patch.object(rt, "_mqtt_listen", side_effect=Exception("Retry test")),
+    ):
+        # Stop after the third sleep
+        mock_sleep.side_effect = [None, None, asyncio.CancelledError]
+        with pytest.raises(asyncio.CancelledError):
+            await rt._mqtt_listener_loop()
+
+    # Backoff 8, 8, then capped at 10
+    sleeps = [call.args[0] for call in mock_sleep.call_args_list]
+    assert all(4.0 <= delay <= 8.0 for delay in sleeps[:2])
+    assert 5.0 <= sleeps[2] <= 10.0
@@ -4,14 +4,6 @@ Tests that instantiate and test real sensor entity classes
 to improve code coverage for sensor.py.
 """
 
-import os
-import sys
-
-# Add project root to path for imports
-TEST_DIR = os.path.dirname(os.path.abspath(__file__))
-ROOT_DIR = os.path.dirname(TEST_DIR)
-sys.path.insert(0, ROOT_DIR)
-
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -21,7 +13,6 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from custom_components.mysa import MysaData
 
-# Module-level imports after path setup
 from custom_components.mysa.sensor import (
     MysaCurrentSensor,
     MysaDiagnosticSensor,
@@ -4,17 +4,11 @@ Simple tests for coordinator patterns using real DataUpdateCoordinator.
 """
 
 import asyncio
-import os
-import sys
+import time
 from datetime import timedelta
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
-# Add project root to path for imports
-TEST_DIR = os.path.dirname(os.path.abspath(__file__))
-ROOT_DIR = os.path.dirname(TEST_DIR)
-sys.path.insert(0, ROOT_DIR)
-
 import pytest
 
 # Module-level imports
@@ -214,6 +208,7 @@ class TestApiCoordinatorIntegration:
 
         mock_api = MysaApi.__new__(MysaApi)
         mock_api.hass = hass
+        mock_api._clock = time.time
         mock_api.client = MysaClient(hass, "u", "p")
         mock_api.states = {}
         mock_api._last_command_time = {}
@@ -1092,7 +1087,8 @@ class TestAsyncPatterns:
         async def long_running_task():
             nonlocal cancelled
             try:
-                await asyncio.sleep(10)
+                # Unresolved future blocks until cancelled without a timer
+                await asyncio.get_running_loop().create_future()
             except asyncio.CancelledError:
                 cancelled = True
                 raise
@@ -1186,6 +1182,7 @@ class TestMysaApiAsyncMocking:
 
             api = MysaApi.__new__(MysaApi)
             api.hass = hass
+            api._clock = time.time
             api.client = MysaClient(hass, "user", "pass")
             api.client._user_obj = MagicMock()  # Session initialized for coverage
             api.states = {}
@@ -1202,6 +1199,7 @@ class TestMysaApiAsyncMocking:
 
         api = MysaApi.__new__(MysaApi)
         api.hass = hass
+        api._clock = time.time
         api.client = MagicMock()
         api.client.user_id = "test-user-id"
         api.client.devices = {"device1": {"type": 4}}
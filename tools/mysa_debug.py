@@ -111,6 +111,7 @@ try:
     )
     from custom_components.mysa.mysa_mqtt import (
         MqttConnection,
+        decode_payload,
     )
 
 except ImportError as e:
@@ -1227,7 +1228,7 @@ class MysaDebugTool:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
 
         try:
-            payload = json.loads(pkt.payload)
+            payload = decode_payload(pkt.payload)
             msg_type = payload.get("msg") or payload.get("MsgType")
 
             # Special handling for Batch Data (MsgType 3)